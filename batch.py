@@ -0,0 +1,94 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pdf_utils import init_parse_worker, parse_in_worker
+from logger import setup_logger
+import glob
+import os
+
+logger = setup_logger('batch_extraction')
+
+def collect_pdf_paths(inputs):
+    """Expand directories and glob patterns into a sorted, de-duplicated list of PDF paths."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True)
+        if not matches:
+            logger.warning(f"No PDF files matched: {item}")
+        paths.extend(m for m in matches if m.lower().endswith(".pdf"))
+    return sorted(set(paths))
+
+def _extract_entries(extractor, pdf_path, pdf_text):
+    """Run LLM extraction for one parsed PDF and tag each entry with its source file."""
+    try:
+        # llm_pool already bounds concurrency, so a long paper's windows run one at a time
+        entries = extractor.extract_parameters(pdf_text, max_workers=1)
+    except Exception as e:
+        logger.error(f"Extraction failed for {pdf_path}: {str(e)}")
+        entries = [{"error": str(e)}]
+    for entry in entries:
+        entry["source_file"] = pdf_path
+    return entries
+
+def iter_batch(pdf_paths, extractor, parse_workers=None, llm_concurrency=4, pdf_cache=None, max_pending=None):
+    """Parse PDFs in a process pool and extract parameters with bounded LLM concurrency.
+
+    Yields (pdf_path, entries) as each paper finishes. Each PDF is handed to the LLM pool
+    as soon as its text is available, so parsing and network calls overlap, and at most
+    ``max_pending`` papers are held in memory at once however large the corpus is.
+    """
+    max_pending = max_pending or (parse_workers or os.cpu_count() or 1) * 2 + llm_concurrency * 2
+    remaining = iter(pdf_paths)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=parse_workers, initializer=init_parse_worker,
+                             initargs=(pdf_cache,)) as parse_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as llm_pool:
+
+        def submit_next_parse():
+            path = next(remaining, None)
+            if path is not None:
+                pending[parse_pool.submit(parse_in_worker, path)] = ("parse", path)
+
+        for _ in range(max_pending):
+            submit_next_parse()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, path = pending.pop(future)
+                if stage == "parse":
+                    try:
+                        pdf_text = future.result()
+                    except Exception as e:
+                        logger.error(f"PDF parsing failed for {path}: {str(e)}")
+                        submit_next_parse()
+                        yield path, [{"error": str(e), "source_file": path}]
+                        continue
+                    pending[llm_pool.submit(_extract_entries, extractor, path, pdf_text)] = ("extract", path)
+                else:
+                    submit_next_parse()
+                    yield path, future.result()
+
+def run_batch(pdf_paths, extractor, parse_workers=None, llm_concurrency=4, pdf_cache=None, writer=None):
+    """Run a batch and either stream entries to ``writer`` or return them merged in input order.
+
+    With a writer, each paper's entries are written as soon as they are ready and only the
+    number of entries written is returned, so memory stays flat across large corpora.
+    """
+    results = {}
+    written = 0
+    for finished, (path, entries) in enumerate(
+            iter_batch(pdf_paths, extractor, parse_workers, llm_concurrency, pdf_cache), 1):
+        logger.info(f"Finished {path} ({finished}/{len(pdf_paths)})")
+        if writer is not None:
+            writer.write_entries(entries)
+            written += len(entries)
+        else:
+            results[path] = entries
+    if writer is not None:
+        return written
+
+    merged = []
+    for path in pdf_paths:
+        merged.extend(results.get(path, []))
+    return merged
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+from langchain_community.vectorstores import FAISS
+from extraction.embedding_cache import QueryEmbeddingCache
+from extraction.fakes import FakeChatModel, FakeEmbeddings
+from extraction.llm_extractor import LLMExtractor
+from pdf_utils import extract_text_from_pdf
+from logger import setup_logger
+
+logger = setup_logger('benchmark')
+
+DEFAULT_OUTPUT = "output/benchmark_results.json"
+PAGE_SIZES = (1, 10, 50, 200)
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_synthetic_pdf(path, pages, paragraphs, lines_per_page=45, chars_per_line=90):
+    """Write a minimal text-only PDF with the given number of pages, cycling through paragraphs."""
+    words = " ".join(paragraphs).split()
+    lines, current, position = [], "", 0
+    while len(lines) < pages * lines_per_page:
+        word = words[position % len(words)]
+        position += 1
+        if len(current) + len(word) + 1 > chars_per_line:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}".strip()
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    page_ids = []
+    for page in range(pages):
+        page_lines = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        body = "BT /F1 10 Tf 12 TL 40 780 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in page_lines) + " ET"
+        stream = body.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+def summarize(samples):
+    """Latency percentiles (milliseconds) and throughput for a list of durations in seconds."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    total = sum(samples)
+    return {"n": len(samples), "p50_ms": pct(50), "p90_ms": pct(90), "p99_ms": pct(99),
+            "mean_ms": statistics.mean(samples) * 1000, "throughput_per_s": len(samples) / total if total else None}
+
+def time_calls(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage / (1024 * 1024) if platform.system() == "Darwin" else usage / 1024
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(page_sizes=PAGE_SIZES, repeats=5, llm_latency=0.05, embedding_latency=0.01, entries=10):
+    """Benchmark each pipeline stage offline with fake chat and embedding models."""
+    with open("rag/chunking_eval.json", "r", encoding="utf-8") as f:
+        paragraphs = [document["text"] for document in json.load(f)]
+    with open("rag/sample_example.txt", "r", encoding="utf-8") as f:
+        examples = json.load(f)
+
+    report = {"commit": _git_commit(), "timestamp": time.time(), "repeats": repeats,
+              "llm_latency_s": llm_latency, "embedding_latency_s": embedding_latency, "stages": {}}
+    stages = report["stages"]
+    embeddings = FakeEmbeddings(latency=embedding_latency)
+    response = json.dumps([dict(examples[i % len(examples)]) for i in range(entries)], ensure_ascii=False)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # PDF parsing at several document sizes
+        pdf_texts = {}
+        for pages in page_sizes:
+            pdf_path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(pdf_path, pages, paragraphs)
+            stages[f"pdf_parse_{pages}p"] = summarize(time_calls(lambda: extract_text_from_pdf(pdf_path), repeats))
+            pdf_texts[pages] = extract_text_from_pdf(pdf_path)
+
+        # Index load and retrieval
+        index_path = os.path.join(workdir, "index.faiss")
+        FAISS.from_texts([e["text_snippet"] for e in examples], embeddings, metadatas=examples).save_local(index_path)
+        extractor = LLMExtractor(category="Metal Oxides", faiss_index_path=index_path,
+                                 llm=FakeChatModel(responses=[response], latency=llm_latency),
+                                 embeddings=embeddings, embedding_cache=QueryEmbeddingCache(path=None))
+        stages["index_load"] = summarize(time_calls(lambda: extractor.load_vector_store(index_path), repeats))
+        stages["similarity_search"] = summarize(time_calls(
+            lambda: extractor.vector_store.similarity_search(pdf_texts[page_sizes[0]][:2000], k=3), repeats))
+
+        for pages, text in pdf_texts.items():
+            # Fresh cache per run so the query embedding is measured, not the cache
+            def retrieve():
+                extractor.embedding_cache = QueryEmbeddingCache(path=None)
+                extractor.retrieve_examples(text)
+            stages[f"retrieval_{pages}p"] = summarize(time_calls(retrieve, repeats))
+            stages[f"prompt_build_{pages}p"] = summarize(time_calls(lambda: extractor.build_prompt(text), repeats))
+
+        stages[f"response_parse_{entries}e"] = summarize(
+            time_calls(lambda: extractor.parse_response(response), repeats * 20))
+        stages[f"end_to_end_{page_sizes[0]}p"] = summarize(
+            time_calls(lambda: extractor.extract_parameters(pdf_texts[page_sizes[0]]), repeats))
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+def compare(report, baseline, threshold=0.2):
+    """Return stages whose p50 latency regressed by more than ``threshold`` relative to the baseline."""
+    regressions = []
+    for stage, stats in report["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base and base["p50_ms"] and stats["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append({"stage": stage, "baseline_p50_ms": base["p50_ms"], "p50_ms": stats["p50_ms"]})
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the extraction pipeline.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--pages", type=int, nargs="+", default=list(PAGE_SIZES), help="Synthetic PDF sizes")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake chat model latency in seconds")
+    parser.add_argument("--embedding-latency", type=float, default=0.01, help="Fake embedding latency in seconds")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown before flagging")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.pages, args.repeats, args.llm_latency, args.embedding_latency)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<24} p50 {stats['p50_ms']:9.2f} ms  p90 {stats['p90_ms']:9.2f} ms  "
+              f"p99 {stats['p99_ms']:9.2f} ms  {stats['throughput_per_s'] or 0:9.1f}/s")
+    print(f"peak RSS {report['peak_rss_mb']:.1f} MiB; results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']}: {regression['baseline_p50_ms']:.2f} -> "
+                  f"{regression['p50_ms']:.2f} ms")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,46 @@
+import json
+import sys
+import time
+from extraction.chunking import build_retrieval_query
+from extraction.llm_extractor import LLMExtractor
+from logger import setup_logger
+
+logger = setup_logger('compare_retrieval')
+
+def compare_retrieval(texts, extractor, k=3):
+    """Compare full-text and compact-query retrieval by latency and retrieved-example overlap."""
+    results = []
+    for text in texts:
+        start = time.perf_counter()
+        full_vector = extractor.embeddings.embed_query(text)
+        full_docs = extractor.vector_store.similarity_search_by_vector(full_vector, k=k)
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compact_vector = extractor.embeddings.embed_query(build_retrieval_query(text))
+        compact_docs = extractor.vector_store.similarity_search_by_vector(compact_vector, k=k)
+        compact_seconds = time.perf_counter() - start
+
+        full_set = {doc.page_content for doc in full_docs}
+        compact_set = {doc.page_content for doc in compact_docs}
+        results.append({
+            "full_query_chars": len(text),
+            "full_seconds": full_seconds,
+            "compact_seconds": compact_seconds,
+            "overlap": len(full_set & compact_set) / k,
+        })
+    return {
+        "documents": len(results),
+        "mean_full_seconds": sum(r["full_seconds"] for r in results) / len(results),
+        "mean_compact_seconds": sum(r["compact_seconds"] for r in results) / len(results),
+        "mean_overlap": sum(r["overlap"] for r in results) / len(results),
+        "per_document": results,
+    }
+
+if __name__ == "__main__":
+    # Defaults to the labelled sample papers; pass a JSON file of [{"text": ...}] to use another corpus
+    corpus_path = sys.argv[1] if len(sys.argv) > 1 else "rag/chunking_eval.json"
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        corpus = [document["text"] for document in json.load(f)]
+    report = compare_retrieval(corpus, LLMExtractor(category="Metal Oxides"))
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,174 @@
+import argparse
+import zlib
+import numpy as np
+from extraction.merging import normalize_value
+from normalize import parse_duration, parse_temperature
+from writers import open_writer, read_entries
+from logger import setup_logger
+
+logger = setup_logger('dedup')
+
+NUM_PERM = 128
+BANDS = 32
+# Each normalized field token is repeated this many times so fields weigh against the snippet's shingles
+FIELD_WEIGHT = 2
+THRESHOLD = 0.7
+# Candidate pairs whose signatures are compared at once (bounds memory)
+VERIFY_BATCH = 50000
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def field_tokens(entry):
+    """Normalized field tokens: method, precursor, solvent and 10 °C / 1 h buckets of the parsed ranges."""
+    tokens = [f"{name}={normalize_value(entry.get(name))}" for name in ("method", "precursor", "solvent")]
+    temp_min, temp_max = parse_temperature(entry.get("temperature"))
+    if temp_min is not None:
+        tokens.append(f"temperature={round(temp_min, -1)}-{round(temp_max, -1)}")
+    time_min, time_max = parse_duration(entry.get("reaction_time"))
+    if time_min is not None:
+        tokens.append(f"time={round(time_min)}-{round(time_max)}")
+    return tokens
+
+def _word_shingles(texts):
+    """Return (values, owners) for every pair of adjacent words in every text.
+
+    Each word is hashed once; pairs are packed from neighbouring word hashes in NumPy.
+    """
+    words = [text.split() or [""] for text in texts]
+    hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for w in words for word in w), dtype=np.uint64)
+    owners = np.repeat(np.arange(len(words)), [len(w) for w in words])
+    # A one-word text keeps its word as its only shingle
+    single = np.fromiter((len(w) == 1 for w in words), dtype=bool, count=len(words))
+    same_owner = owners[1:] == owners[:-1]
+    pairs = ((hashes[:-1] << np.uint64(32)) | hashes[1:])[same_owner]
+    values = np.concatenate((pairs, hashes[single[owners]]))
+    owners = np.concatenate((owners[:-1][same_owner], owners[single[owners]]))
+    order = np.argsort(owners, kind="stable")
+    return values[order], owners[order]
+
+def _minhash(values, owners, n, a, b):
+    """Per-owner minima of multiply-shift hashes of the values, one column per (a, b) pair.
+
+    ``owners`` must be sorted and every owner in range(n) must have at least one value.
+    """
+    offsets = np.searchsorted(owners, np.arange(n))
+    with np.errstate(over="ignore"):
+        permuted = ((a * (values * _GOLDEN)[None, :] + b) >> np.uint64(32)).astype(np.uint32)
+    return np.minimum.reduceat(permuted, offsets, axis=1).T
+
+def minhash_signatures(entries, num_perm=NUM_PERM, field_weight=FIELD_WEIGHT, seed=1, block_size=512):
+    """Compute MinHash signatures (one row of ``num_perm`` values per entry) with NumPy.
+
+    Features are word bigrams of the normalized ``text_snippet`` plus the entry's field
+    tokens, each repeated ``field_weight`` times so fields weigh against the snippet.
+    Shingling, hashing and the per-entry minimum are vectorized over blocks of entries.
+    """
+    rng = np.random.RandomState(seed)
+    a = (rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+    b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None]
+    signatures = np.empty((len(entries), num_perm), dtype=np.uint32)
+    for start in range(0, len(entries), block_size):
+        block = entries[start:start + block_size]
+        values, owners = _word_shingles([normalize_value(entry.get("text_snippet")) for entry in block])
+        snippet_signatures = _minhash(values, owners, len(block), a, b)
+
+        # Field tokens always include method/precursor/solvent, so no entry is left without features
+        tokens = [field_tokens(entry) for entry in block]
+        hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for t in tokens for token in t), dtype=np.uint64)
+        field_values = (np.repeat(hashes, field_weight) << np.uint64(32)) | np.tile(
+            np.arange(field_weight, dtype=np.uint64), len(hashes))
+        field_owners = np.repeat(np.arange(len(block)), [len(t) * field_weight for t in tokens])
+        field_signatures = _minhash(field_values, field_owners, len(block), a, b)
+        signatures[start:start + len(block)] = np.minimum(snippet_signatures, field_signatures)
+    return signatures
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def cluster_signatures(signatures, bands=BANDS, threshold=THRESHOLD):
+    """Group near-duplicate signatures with LSH banding; returns a cluster id per row.
+
+    Rows sharing any band become candidates, and candidates are only linked when their
+    estimated Jaccard similarity (fraction of agreeing MinHash values) reaches ``threshold``.
+    Each row is checked against the first and the previous member of its bucket, so the
+    work grows with the number of rows rather than the number of pairs.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+    band_weights = np.random.RandomState(0).randint(1, 1 << 62, size=rows, dtype=np.uint64)
+    band_codes = []
+    for band in range(bands):
+        with np.errstate(over="ignore"):
+            keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * band_weights).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        same_as_previous = np.concatenate(([False], sorted_keys[1:] == sorted_keys[:-1]))
+        group_start = np.maximum.accumulate(np.where(same_as_previous, 0, np.arange(n)))
+        members = np.nonzero(same_as_previous)[0]
+        # Candidate pairs are (bucket member, previous member) and (bucket member, first member)
+        for other in (order[members - 1], order[group_start[members]]):
+            low, high = np.minimum(order[members], other), np.maximum(order[members], other)
+            band_codes.append(np.unique(low * n + high))
+    codes = np.unique(np.concatenate(band_codes))
+    for start in range(0, len(codes), VERIFY_BATCH):
+        first, second = np.divmod(codes[start:start + VERIFY_BATCH], n)
+        linked = (signatures[first] == signatures[second]).mean(axis=1) >= threshold
+        for i, j in zip(first[linked].tolist(), second[linked].tolist()):
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+    # Point every row straight at its root
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+def dedup_entries(entries, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """Collapse near-duplicate entries, keeping provenance.
+
+    Each cluster keeps its first entry, fills that entry's missing fields from the other
+    members, and records ``duplicates`` (cluster size) and ``sources`` (distinct
+    ``source_file`` values). Error entries pass through unchanged.
+    """
+    valid = [entry for entry in entries if "error" not in entry]
+    errors = [entry for entry in entries if "error" in entry]
+    if not valid:
+        return errors
+    signatures = minhash_signatures(valid, num_perm)
+    clusters = {}
+    for entry, cluster in zip(valid, cluster_signatures(signatures, bands, threshold)):
+        clusters.setdefault(int(cluster), []).append(entry)
+    merged = []
+    for members in clusters.values():
+        entry = dict(members[0])
+        for other in members[1:]:
+            for field, value in other.items():
+                if entry.get(field) in (None, "", "null") and value not in (None, "", "null"):
+                    entry[field] = value
+        entry["duplicates"] = len(members)
+        entry["sources"] = sorted({m["source_file"] for m in members if m.get("source_file")})
+        merged.append(entry)
+    logger.info(f"Collapsed {len(valid)} entries into {len(merged)} clusters")
+    return merged + errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate synthesis entries (MinHash + LSH).")
+    parser.add_argument("input", help="JSON or JSONL results file")
+    parser.add_argument("--output", required=True, help="Where to write the deduplicated entries")
+    parser.add_argument("--format", choices=["json", "jsonl", "csv", "parquet"], default="jsonl")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Estimated Jaccard similarity to merge at")
+    parser.add_argument("--bands", type=int, default=BANDS, help=f"LSH bands ({NUM_PERM} must divide evenly)")
+    args = parser.parse_args()
+    if NUM_PERM % args.bands:
+        parser.error(f"--bands must divide {NUM_PERM}")
+
+    deduped = dedup_entries(read_entries(args.input), args.threshold, bands=args.bands)
+    with open_writer(args.output, args.format) as writer:
+        writer.write_entries(deduped)
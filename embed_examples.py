@@ -1,47 +1,138 @@
 import os
 import json
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
+import hashlib
+import argparse
+from extraction.rate_limit import retry_sync
 from logger import setup_logger
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 logger = setup_logger('embed_examples')
 
-def embed_examples():
-    """Generate and save FAISS embeddings for RAG examples."""
+EXAMPLES_PATH = "rag/sample_example.txt"
+INDEX_PATH = "rag/example_index.faiss"
+MANIFEST_NAME = "manifest.json"
+
+def example_id(example):
+    """Return a stable content hash identifying an example record."""
+    return hashlib.sha256(json.dumps(example, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def embed_in_batches(embeddings, texts, batch_size=50, max_retries=5, base_delay=1.0):
+    """Embed texts in batches, retrying rate-limit and transient errors with jittered exponential backoff.
+
+    Other errors (a bad API key, a malformed request) fail immediately.
+    """
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        try:
+            vectors.extend(retry_sync(lambda: embeddings.embed_documents(batch), max_retries, base_delay))
+        except Exception as e:
+            logger.error(f"Embedding batch at {start} failed: {str(e)}")
+            raise
+        logger.info(f"Embedded {min(start + batch_size, len(texts))}/{len(texts)} examples")
+    return vectors
+
+def load_manifest(index_path=INDEX_PATH):
+    """Return the manifest of embedded example ids, or None if the index has none."""
+    manifest_path = os.path.join(index_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(ids, embeddings, index_path=INDEX_PATH):
+    """Record the example ids and which embedding backend (and model) built the index."""
+    from extraction.embeddings import embedding_identity
+
+    backend, model_id = embedding_identity(embeddings)
+    with open(os.path.join(index_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"embedding_backend": backend, "embedding_model": model_id, "ids": sorted(ids)}, f, indent=4)
+
+def embed_examples(incremental=True, batch_size=50, max_retries=5,
+                   examples_path=EXAMPLES_PATH, index_path=INDEX_PATH, embedding_backend=None):
+    """Generate and save FAISS embeddings for RAG examples.
+
+    In incremental mode only new or changed examples are embedded and deleted ones are
+    removed; each document stores its full example record as metadata. The backend comes
+    from ``embedding_backend`` or EMBEDDING_BACKEND. The local hashed-tfidf backend refits
+    its IDF on every build, so it always rebuilds fully (no network involved).
+    """
+    # Deferred so --help and argument errors do not pay for LangChain or .env loading
+    from langchain_community.vectorstores import FAISS
+    from env import load_env
+    from extraction.embeddings import backend_requires_api_key, configured_backend, embedding_identity, make_embeddings
+
     try:
-        # Load Gemini API key
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            logger.error("GEMINI_API_KEY not found in .env file or environment variables")
-            raise ValueError("GEMINI_API_KEY not found in .env file or environment variables")
-        
+        backend = configured_backend(embedding_backend)
+        api_key = None
+        if backend_requires_api_key(backend):
+            # Load Gemini API key
+            load_env()
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                logger.error("GEMINI_API_KEY not found in .env file or environment variables")
+                raise ValueError("GEMINI_API_KEY not found in .env file or environment variables")
+
         # Initialize embeddings
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=api_key)
-        logger.info("Initialized Gemini embeddings")
-        
-        # Load examples from sample_example.txt
-        with open("rag/sample_example.txt", "r") as f:
-            examples = json.load(f)
-        
-        # Prepare texts for embedding (use text_snippet field)
-        texts = [example["text_snippet"] for example in examples]
-        logger.info(f"Loaded {len(texts)} examples for embedding")
-        
-        # Create FAISS index
-        vector_store = FAISS.from_texts(texts, embeddings)
-        logger.info("Created FAISS index")
-        
+        embeddings = make_embeddings(backend, api_key=api_key)
+
+        # Load examples from sample_example.txt, keyed by content hash
+        with open(examples_path, "r", encoding="utf-8") as f:
+            examples = {example_id(example): example for example in json.load(f)}
+        logger.info(f"Loaded {len(examples)} examples for embedding")
+
+        if hasattr(embeddings, "fit"):
+            embeddings.fit([example["text_snippet"] for example in examples.values()])
+            incremental = False
+        manifest = load_manifest(index_path) if incremental else None
+        if manifest is not None and (manifest.get("embedding_backend", "gemini"),
+                                     manifest.get("embedding_model")) == embedding_identity(embeddings):
+            vector_store = FAISS.load_local(index_path, embeddings, allow_dangerous_deserialization=True)
+            existing = set(manifest["ids"])
+            removed = sorted(existing - examples.keys())
+            added = [i for i in examples if i not in existing]
+            if removed:
+                vector_store.delete(removed)
+                logger.info(f"Removed {len(removed)} deleted examples")
+            if added:
+                texts = [examples[i]["text_snippet"] for i in added]
+                vectors = embed_in_batches(embeddings, texts, batch_size, max_retries)
+                vector_store.add_embeddings(
+                    list(zip(texts, vectors)), metadatas=[examples[i] for i in added], ids=added
+                )
+            logger.info(f"Incremental update: {len(added)} added, {len(removed)} removed, "
+                        f"{len(existing) - len(removed)} unchanged")
+            if not added and not removed:
+                return
+        else:
+            if incremental:
+                logger.info("No usable manifest found; performing a full rebuild")
+            ids = list(examples)
+            texts = [examples[i]["text_snippet"] for i in ids]
+            vectors = embed_in_batches(embeddings, texts, batch_size, max_retries)
+            vector_store = FAISS.from_embeddings(
+                list(zip(texts, vectors)), embeddings, metadatas=[examples[i] for i in ids], ids=ids
+            )
+            logger.info("Created FAISS index")
+
         # Save FAISS index
-        vector_store.save_local("rag/example_index.faiss")
-        logger.info("Saved FAISS index to rag/example_index.faiss")
-        
+        vector_store.save_local(index_path)
+        if hasattr(embeddings, "save"):
+            embeddings.save(index_path)
+        save_manifest(examples.keys(), embeddings, index_path)
+        logger.info(f"Saved FAISS index to {index_path}")
+
     except Exception as e:
         logger.error(f"Error generating embeddings: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    embed_examples()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build or update the FAISS index of RAG examples.")
+    parser.add_argument("--full", action="store_true", help="Re-embed every example instead of updating incrementally")
+    parser.add_argument("--batch-size", type=int, default=50, help="Number of examples per embedding request")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per batch on rate-limit and transient embedding errors")
+    parser.add_argument("--embedding-backend",
+                        help="gemini (default) or hashed-tfidf for local, offline embeddings; "
+                             "overrides EMBEDDING_BACKEND")
+    args = parser.parse_args()
+    embed_examples(incremental=not args.full, batch_size=args.batch_size, max_retries=args.max_retries,
+                   embedding_backend=args.embedding_backend)
@@ -0,0 +1,13 @@
+import threading
+from dotenv import load_dotenv
+
+_lock = threading.Lock()
+_loaded = False
+
+def load_env():
+    """Load .env once per process, on first use rather than at import."""
+    global _loaded
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
@@ -0,0 +1,87 @@
+# Kept free of heavy imports so CLIs can validate --category without loading LangChain
+import difflib
+import re
+
+CATEGORY_INSTRUCTIONS = {
+    "Metal Oxides": "Focus on parameters like precursor (e.g., zinc nitrate, ammonium carbonate, aluminum nitrate), temperature (e.g., 100-240°C), pH (e.g., 6-8 or null), solvent (e.g., deionized water), and methods like hydrothermal, sol-gel, or calcination.",
+    "Metal Sulfides": "Focus on parameters like sulfur source (e.g., thiourea), temperature (e.g., 150-300°C), solvent, and methods like chemical vapor deposition, solvothermal, or precipitation.",
+    "Metal-Organic Frameworks": "Focus on parameters like metal ion (e.g., zinc, copper), organic linker (e.g., terephthalic acid), solvent (e.g., DMF), temperature (e.g., 100-150°C), and methods like solvothermal or microwave-assisted synthesis.",
+    "Carbon-based": "Focus on parameters like carbon source (e.g., methane, glucose), temperature (e.g., 700-1000°C), catalyst, and methods like chemical vapor deposition, arc discharge, or pyrolysis.",
+    "Polymeric Nanomaterials": "Focus on parameters like monomer (e.g., styrene), initiator (e.g., AIBN), solvent, temperature (e.g., 60-80°C), and methods like emulsion polymerization or electrospinning.",
+    "Pure Metals / Alloys": "Focus on parameters like metal precursor (e.g., gold chloride), reduction agent (e.g., sodium borohydride), temperature (e.g., 20-100°C), and methods like chemical reduction or electrodeposition."
+}
+
+CATEGORIES = list(CATEGORY_INSTRUCTIONS)
+
+# Extract every category in one pass, labelling each entry with its own category
+ALL_CATEGORIES = "All categories"
+CATEGORY_CHOICES = CATEGORIES + [ALL_CATEGORIES]
+
+# Cheap routing signals per category: material names, formulas and characteristic reagents/methods
+CATEGORY_KEYWORDS = {
+    # Hydroxides, peroxides and oxides of non-metals (graphene oxide, carbon dioxide) are not metal oxides
+    "Metal Oxides": re.compile(
+        r"(?i:(?<!carbon )(?<!graphene )(?<!graphite )(?<!sulfur )(?<!sulphur )(?<!nitrogen )"
+        r"\b(?!\w*(?:hydr|per)oxides?\b)\w*oxides?\b|\bcalcin\w*|\bsol-gel\b)"
+        r"|\b(?:Zn|Ti|Fe|Al|Si|Ce|Cu|Ni|Co|Mn|Mg|Zr|Sn|W|V|In)\d*O\d*\b"
+    ),
+    "Metal Sulfides": re.compile(
+        r"(?i:\b\w*sul(?:f|ph)ides?\b|\bthio(?:urea|acetamide)\b|\bsul(?:f|ph)ur\b)"
+        r"|\b(?:Zn|Cd|Mo|Cu|Pb|Ni|Co|Fe|Sn|Bi|Ag|W|Na)\d*S\d*\b"
+    ),
+    "Metal-Organic Frameworks": re.compile(
+        r"(?i:metal[\s-]organic framework|\bmofs?\b|\bzif-\d+|\buio-\d+|\bhkust|\bmil-\d+|terephthalic|trimesic"
+        r"|\blinkers?\b|\bh2bdc\b|\bbtc\b)"
+    ),
+    "Carbon-based": re.compile(
+        r"(?i:graphene|graphite|carbon (?:nano)?(?:tubes?|dots?|fibers?|spheres?)|\bcnts?\b|fullerene|\bc60\b"
+        r"|carboni[sz]\w*|arc discharge|\bglucose\b)"
+    ),
+    "Polymeric Nanomaterials": re.compile(
+        r"(?i:polymer\w*|monomers?|\binitiator|\baibn\b|styrene|electrospinning|\blatex\b|\bplga\b|chitosan"
+        r"|\bpoly\()"
+    ),
+    "Pure Metals / Alloys": re.compile(
+        r"(?i:\balloys?\b|\b(?:gold|silver|platinum|palladium|copper|nickel) nanoparticles|\bhaucl4\b|\bagno3\b"
+        r"|\bh2ptcl6\b|borohydride|\bnabh4\b|trisodium citrate|electrodeposit\w*|\bzero-?valent\b)"
+    ),
+}
+
+def category_scores(text):
+    """Return the number of routing keyword hits per category in a piece of text."""
+    return {category: len(pattern.findall(text)) for category, pattern in CATEGORY_KEYWORDS.items()}
+
+# Distinctive words that identify a category inside a longer or shortened label
+CATEGORY_ALIASES = {
+    "Metal Oxides": ("oxide",),
+    "Metal Sulfides": ("sulfide", "sulphide"),
+    "Metal-Organic Frameworks": ("metal-organic", "metal organic", "mof"),
+    "Carbon-based": ("carbon",),
+    "Polymeric Nanomaterials": ("polymer",),
+    "Pure Metals / Alloys": ("alloy", "pure metal"),
+}
+
+def _unique(matches):
+    return matches[0] if len(matches) == 1 else None
+
+def normalize_category(label):
+    """Map a model-produced category label onto CATEGORIES, or None if it matches none or several.
+
+    Tries an exact match, then a category name contained in the label ("Carbon-based
+    nanomaterials"), then distinctive words ("MOFs", "Alloys"), and only then a strict
+    fuzzy match for typos. Labels naming several categories are ambiguous and give None.
+    """
+    if not isinstance(label, str):
+        return None
+    text = " ".join(label.lower().split())
+    by_lower = {category.lower(): category for category in CATEGORIES}
+    if text in by_lower:
+        return by_lower[text]
+    contained = [category for lower, category in by_lower.items() if lower in text]
+    if contained:
+        return _unique(contained)
+    aliased = [category for category, aliases in CATEGORY_ALIASES.items() if any(a in text for a in aliases)]
+    if aliased:
+        return _unique(aliased)
+    match = difflib.get_close_matches(text, list(by_lower), n=1, cutoff=0.85)
+    return by_lower[match[0]] if match else None
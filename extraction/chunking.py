@@ -0,0 +1,247 @@
+import json
+import math
+import re
+from logger import setup_logger
+
+logger = setup_logger('chunking')
+
+# Weighted terms that signal synthesis procedures; matched case-insensitively
+SYNTHESIS_KEYWORDS = {
+    "precursor": 3.0,
+    "°c": 3.0,
+    "calcined": 3.0,
+    "calcination": 3.0,
+    "autoclave": 3.0,
+    "hydrothermal": 2.5,
+    "solvothermal": 2.5,
+    "sol-gel": 2.5,
+    "annealed": 2.0,
+    "annealing": 2.0,
+    "teflon": 2.0,
+    "furnace": 2.0,
+    "reflux": 2.0,
+    "synthesized": 1.5,
+    "synthesis": 1.0,
+    "prepared": 1.5,
+    "dissolved": 1.5,
+    "stirred": 1.5,
+    "stirring": 1.5,
+    "centrifuged": 1.5,
+    "washed": 1.0,
+    "dried": 1.0,
+    "heated": 1.0,
+    "precipitate": 1.5,
+    "nitrate": 1.5,
+    "chloride": 1.0,
+    "acetate": 1.0,
+    "sulfate": 1.0,
+    "thiourea": 1.5,
+    "mmol": 2.0,
+    "ml": 1.0,
+    "ph": 1.0,
+    "deionized": 1.5,
+    "ethanol": 1.0,
+}
+
+# Section headings that usually hold (or never hold) synthesis details
+RELEVANT_HEADINGS = ("experimental", "synthesis", "preparation", "materials", "methods", "fabrication")
+IRRELEVANT_HEADINGS = ("reference", "acknowledg", "introduction", "conclusion", "author", "funding")
+
+HEADING_PATTERN = re.compile(r"^\s*(?:\d+(?:\.\d+)*\.?\s+)?[A-Z][A-Za-z0-9 ,/&()\-]{2,80}$")
+KEYWORD_PATTERN = re.compile(
+    "|".join(re.escape(k) if not k.isalpha() else rf"\b{k}\b" for k in SYNTHESIS_KEYWORDS),
+    re.IGNORECASE,
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+SYNTHESIS_QUERY = "Nanoparticles were synthesized from precursor solutions by hydrothermal treatment in an autoclave at 180 °C, then calcined."
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for prompt budgeting."""
+    return len(text) // 4 + 1
+
+def _is_heading(line):
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80 or stripped.endswith((".", ",", ";", ":")):
+        return False
+    if stripped.isupper() and len(stripped.split()) <= 8:
+        return True
+    return bool(HEADING_PATTERN.match(stripped)) and len(stripped.split()) <= 8
+
+def _hard_split(sentence, max_chunk_chars):
+    """Cut text with no usable sentence breaks (tables, reference lists) at the last space within the limit."""
+    pieces = []
+    while len(sentence) > max_chunk_chars:
+        cut = sentence.rfind(" ", 0, max_chunk_chars + 1)
+        if cut <= 0:
+            cut = max_chunk_chars
+        pieces.append(sentence[:cut].rstrip())
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+def _split_long(paragraph, max_chunk_chars):
+    """Split an oversized paragraph on sentence boundaries into pieces of at most max_chunk_chars.
+
+    Sentences longer than the limit are cut by _hard_split.
+    """
+    pieces = []
+    current = ""
+    sentences = (piece for sentence in SENTENCE_SPLIT.split(paragraph)
+                 for piece in _hard_split(sentence, max_chunk_chars))
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > max_chunk_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_into_chunks(text, max_chunk_chars=1500):
+    """Split paper text into paragraph chunks tagged with the section heading they fall under."""
+    chunks = []
+    heading = ""
+    paragraph_lines = []
+
+    def flush():
+        paragraph = " ".join(line.strip() for line in paragraph_lines).strip()
+        paragraph_lines.clear()
+        if not paragraph:
+            return
+        for piece in _split_long(paragraph, max_chunk_chars):
+            chunks.append({"index": len(chunks), "heading": heading, "text": piece})
+
+    for line in text.splitlines():
+        if not line.strip():
+            flush()
+        elif _is_heading(line):
+            flush()
+            heading = line.strip()
+        else:
+            paragraph_lines.append(line)
+            if sum(len(l) for l in paragraph_lines) >= max_chunk_chars:
+                flush()
+    flush()
+    return chunks
+
+def score_chunk(chunk):
+    """Score a chunk for synthesis relevance from keyword hits and its section heading."""
+    hits = KEYWORD_PATTERN.findall(chunk["text"])
+    # Dampen long chunks so a long results section cannot win on volume alone
+    length_factor = math.sqrt(max(estimate_tokens(chunk["text"]), 50) / 50.0)
+    score = sum(SYNTHESIS_KEYWORDS[hit.lower()] for hit in hits) / length_factor
+    heading = chunk["heading"].lower()
+    if any(h in heading for h in RELEVANT_HEADINGS):
+        score += 5.0
+    elif any(h in heading for h in IRRELEVANT_HEADINGS):
+        score -= 5.0
+    return score
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def rank_chunks(chunks, embeddings=None, embedding_weight=10.0):
+    """Return (score, chunk) pairs sorted by relevance, optionally blending embedding similarity."""
+    scores = [score_chunk(chunk) for chunk in chunks]
+    if embeddings is not None and chunks:
+        query_vector = embeddings.embed_query(SYNTHESIS_QUERY)
+        chunk_vectors = embeddings.embed_documents([chunk["text"] for chunk in chunks])
+        scores = [s + embedding_weight * _cosine(query_vector, v) for s, v in zip(scores, chunk_vectors)]
+    return sorted(zip(scores, chunks), key=lambda pair: pair[0], reverse=True)
+
+def select_relevant_chunks(text, token_budget=2000, embeddings=None, max_chunk_chars=1500):
+    """Keep the most synthesis-relevant chunks that fit in token_budget, in document order."""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    chunks = split_into_chunks(text, max_chunk_chars)
+    selected = []
+    used = 0
+    for score, chunk in rank_chunks(chunks, embeddings):
+        if score <= 0:
+            break
+        cost = estimate_tokens(chunk["text"])
+        if used + cost > token_budget:
+            continue
+        selected.append(chunk)
+        used += cost
+    if not selected:
+        logger.warning("No synthesis-relevant chunks found; falling back to the top-ranked chunk")
+        selected = [chunk for _, chunk in rank_chunks(chunks)[:1]]
+        used = estimate_tokens(selected[0]["text"]) if selected else 0
+    selected.sort(key=lambda chunk: chunk["index"])
+    logger.info(f"Selected {len(selected)}/{len(chunks)} chunks (~{used} tokens of {estimate_tokens(text)})")
+    return "\n\n".join(
+        f"{chunk['heading']}\n{chunk['text']}" if chunk["heading"] else chunk["text"] for chunk in selected
+    )
+
+def build_retrieval_query(text, max_chars=1000):
+    """Build a compact retrieval query: the most synthesis-relevant chunk, else the abstract.
+
+    Embedding this instead of the whole paper keeps the query well under embedding input
+    limits and makes retrieval a small, cacheable call.
+    """
+    chunks = split_into_chunks(text)
+    if not chunks:
+        return text[:max_chars]
+    ranked = rank_chunks(chunks)
+    if ranked[0][0] > 0:
+        return ranked[0][1]["text"][:max_chars]
+    for chunk in chunks:
+        if "abstract" in chunk["heading"].lower():
+            return chunk["text"][:max_chars]
+    return chunks[0]["text"][:max_chars]
+
+def group_chunks(chunks, max_tokens):
+    """Pack consecutive chunks into text windows of at most max_tokens each for map-style extraction.
+
+    A new window is started at each section boundary once the current one is half full, so
+    separate experimental sections tend to land in separate windows.
+    """
+    windows = []
+    current = []
+    used = 0
+    for chunk in chunks:
+        cost = estimate_tokens(chunk["text"])
+        new_section = current and chunk["heading"] != current[-1]["heading"] and used >= max_tokens // 2
+        if current and (used + cost > max_tokens or new_section):
+            windows.append(current)
+            current, used = [], 0
+        current.append(chunk)
+        used += cost
+    if current:
+        windows.append(current)
+    return [
+        "\n\n".join(f"{c['heading']}\n{c['text']}" if c["heading"] else c["text"] for c in window)
+        for window in windows
+    ]
+
+def evaluate_recall(labelled_path="rag/chunking_eval.json", token_budget=200):
+    """Measure how many labelled synthesis snippets survive chunk selection.
+
+    The default budget is well below every labelled paper's length, so selection has to
+    drop most of each paper; tests/test_chunking.py asserts a recall floor.
+    """
+    with open(labelled_path, "r", encoding="utf-8") as f:
+        documents = json.load(f)
+    found = total = kept_tokens = full_tokens = 0
+    for document in documents:
+        selected = select_relevant_chunks(document["text"], token_budget)
+        kept_tokens += estimate_tokens(selected)
+        full_tokens += estimate_tokens(document["text"])
+        for snippet in document["relevant_snippets"]:
+            total += 1
+            if snippet in selected:
+                found += 1
+            else:
+                logger.warning(f"Missed snippet in {document['id']}: {snippet[:80]}")
+    recall = found / total if total else 1.0
+    return {"recall": recall, "found": found, "total": total,
+            "token_ratio": kept_tokens / full_tokens if full_tokens else 1.0}
+
+if __name__ == "__main__":
+    print(json.dumps(evaluate_recall(), indent=4))
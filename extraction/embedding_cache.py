@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from logger import setup_logger
+
+logger = setup_logger('embedding_cache')
+
+DEFAULT_CACHE_PATH = "cache/query_embeddings.sqlite"
+
+class QueryEmbeddingCache:
+    """Query embeddings keyed by embedding model and SHA-256 of the query text.
+
+    A small in-memory LRU sits in front of an optional SQLite table so repeated queries
+    within a process are free and re-runs do not repeat remote embedding calls.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_entries=1024):
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector TEXT NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model, text):
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get(self, key):
+        """Return the cached vector for a key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            vector = json.loads(row[0])
+            self._remember(key, vector)
+            return vector
+
+    def put(self, key, vector):
+        vector = list(vector)
+        with self._lock:
+            self._remember(key, vector)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                   (key, json.dumps(vector)))
+                self._conn.commit()
+
+    def get_or_embed(self, model, text, embed_query):
+        """Return the embedding of text, calling ``embed_query(text)`` only on a miss."""
+        key = self.make_key(model, text)
+        vector = self.get(key)
+        if vector is None:
+            vector = embed_query(text)
+            self.put(key, vector)
+        return vector
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,158 @@
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from langchain_core.embeddings import Embeddings
+from logger import setup_logger
+
+logger = setup_logger('embeddings')
+
+EMBEDDING_BACKEND_ENV = "EMBEDDING_BACKEND"
+DEFAULT_BACKEND = "gemini"
+GEMINI_MODEL = "models/embedding-001"
+MANIFEST_NAME = "manifest.json"
+# Fitted IDF weights of the local backend, saved next to the FAISS files
+TFIDF_STATE_NAME = "hashed_tfidf.json"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class HashedTfidfEmbeddings(Embeddings):
+    """Local, CPU-only TF-IDF embeddings over hashed word unigrams and bigrams.
+
+    Tokens are hashed into ``dimensions`` signed buckets, weighted by sublinear term
+    frequency and an IDF fitted on the indexed documents, and L2-normalized. Embedding
+    needs no network or API key; an unfitted instance uses uniform IDF.
+    """
+
+    backend = "hashed-tfidf"
+    local = True
+
+    def __init__(self, dimensions=1024, idf=None):
+        self.dimensions = dimensions
+        self.idf = idf
+
+    @property
+    def model_id(self):
+        """Identifies the vector space; changes whenever the fitted IDF does."""
+        digest = zlib.crc32(json.dumps(self.idf).encode("utf-8")) if self.idf else 0
+        return f"{self.backend}-{self.dimensions}-{digest:08x}"
+
+    def _buckets(self, text):
+        words = _TOKEN_RE.findall(text.lower())
+        counts = Counter(words)
+        counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        buckets = {}
+        for token, count in counts.items():
+            digest = zlib.crc32(token.encode("utf-8"))
+            index = digest % self.dimensions
+            sign = 1.0 if digest >> 31 else -1.0
+            buckets[index] = buckets.get(index, 0.0) + sign * (1.0 + math.log(count))
+        return buckets
+
+    def fit(self, texts):
+        """Fit smoothed IDF weights per bucket from a corpus of documents."""
+        document_frequency = [0] * self.dimensions
+        for text in texts:
+            for index in self._buckets(text):
+                document_frequency[index] += 1
+        n = len(texts)
+        self.idf = [math.log((1 + n) / (1 + df)) + 1.0 for df in document_frequency]
+        return self
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimensions
+        for index, weight in self._buckets(text).items():
+            vector[index] = weight * (self.idf[index] if self.idf else 1.0)
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def save(self, index_path):
+        with open(os.path.join(index_path, TFIDF_STATE_NAME), "w", encoding="utf-8") as f:
+            json.dump({"dimensions": self.dimensions, "idf": self.idf}, f)
+
+    @classmethod
+    def load(cls, index_path):
+        """Return the embeddings fitted for an index, or an unfitted instance if it has none."""
+        state_path = os.path.join(index_path, TFIDF_STATE_NAME)
+        if not os.path.exists(state_path):
+            return cls()
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return cls(dimensions=state["dimensions"], idf=state["idf"])
+
+def _gemini(api_key, index_path):
+    # Deferred so the local backend works without the Google client installed
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return GoogleGenerativeAIEmbeddings(model=GEMINI_MODEL, google_api_key=api_key)
+
+def _hashed_tfidf(api_key, index_path):
+    return HashedTfidfEmbeddings.load(index_path) if index_path else HashedTfidfEmbeddings()
+
+# Backend name -> factory(api_key, index_path)
+EMBEDDING_BACKENDS = {"gemini": _gemini, "hashed-tfidf": _hashed_tfidf}
+
+def configured_backend(backend=None):
+    """Return the backend name from the argument or EMBEDDING_BACKEND, validated."""
+    backend = backend or os.getenv(EMBEDDING_BACKEND_ENV) or DEFAULT_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; choose from {', '.join(EMBEDDING_BACKENDS)}")
+    return backend
+
+def backend_requires_api_key(backend=None):
+    return configured_backend(backend) == "gemini"
+
+def make_embeddings(backend=None, api_key=None, index_path=None):
+    """Build the embeddings for a backend; local backends load their fitted state from ``index_path``."""
+    backend = configured_backend(backend)
+    logger.info(f"Using {backend} embeddings")
+    return EMBEDDING_BACKENDS[backend](api_key, index_path)
+
+def embedding_identity(embeddings):
+    """Return (backend, model id) for any embeddings object; unknown ones report their class name."""
+    if type(embeddings).__name__ == "GoogleGenerativeAIEmbeddings":
+        return "gemini", embeddings.model
+    backend = getattr(embeddings, "backend", None) or type(embeddings).__name__
+    return backend, getattr(embeddings, "model_id", None) or backend
+
+def check_index_backend(index_path, embeddings):
+    """Raise ValueError if the index at ``index_path`` was built with a different embedding backend.
+
+    An index without a manifest, or whose manifest predates backend tracking, was built
+    with Gemini. Embeddings that are not a configured backend (e.g. injected fakes) skip
+    this check; check_index_dimensions still applies to them.
+    """
+    backend, model_id = embedding_identity(embeddings)
+    if backend not in EMBEDDING_BACKENDS:
+        return
+    manifest_path = os.path.join(index_path, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    built_backend = manifest.get("embedding_backend", "gemini")
+    built_model = manifest.get("embedding_model", GEMINI_MODEL if built_backend == "gemini" else None)
+    if built_backend != backend or (built_model and built_model != model_id):
+        raise ValueError(
+            f"FAISS index at {index_path} was built with {built_backend} embeddings ({built_model}), "
+            f"but {backend} ({model_id}) is configured; rebuild it with "
+            f"`python embed_examples.py --full --embedding-backend {backend}` or set {EMBEDDING_BACKEND_ENV}"
+        )
+
+def check_index_dimensions(vector_store, embeddings):
+    """Raise ValueError if a loaded index's vectors differ in size from the embeddings' (when known)."""
+    dimensions = getattr(embeddings, "dimensions", None)
+    if dimensions is not None and vector_store.index.d != dimensions:
+        backend, model_id = embedding_identity(embeddings)
+        raise ValueError(
+            f"FAISS index holds {vector_store.index.d}-dimensional vectors but {backend} ({model_id}) "
+            f"embeddings have {dimensions}; rebuild it with `python embed_examples.py --full --embedding-backend {backend}`"
+        )
@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_call_lock = threading.Lock()
+
+class FakeRateLimitError(Exception):
+    """Stand-in for a provider 429 error."""
+    status_code = 429
+
+class FakeChatModel(BaseChatModel):
+    """Local chat model for offline runs: cycles through canned responses with optional latency.
+
+    The first ``fail_times`` calls raise FakeRateLimitError so retry and backoff paths can be
+    exercised without a network. Streaming splits a response into ``chunk_size`` character
+    chunks with the latency spread across them.
+    """
+
+    responses: List[str] = ["[]"]
+    latency: float = 0.0
+    fail_times: int = 0
+    chunk_size: int = 20
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _next_response(self):
+        with _call_lock:
+            self.calls += 1
+            call = self.calls
+        if call <= self.fail_times:
+            raise FakeRateLimitError("429 Resource exhausted (fake)")
+        content = self.responses[(call - self.fail_times - 1) % len(self.responses)]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._next_response()
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        content = self._next_response().generations[0].message.content
+        starts = range(0, len(content), max(1, self.chunk_size))
+        for start in starts:
+            if self.latency:
+                time.sleep(self.latency / len(starts))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[start:start + self.chunk_size]))
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._next_response()
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words embeddings with optional per-call latency."""
+
+    def __init__(self, size=256, latency=0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
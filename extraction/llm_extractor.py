@@ -1,135 +1,582 @@
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from langchain_core.runnables import RunnableSequence
 from langchain_community.vectorstores import FAISS
+from extraction.chunking import (
+    build_retrieval_query, estimate_tokens, group_chunks, select_relevant_chunks, split_into_chunks
+)
+from extraction.categories import ALL_CATEGORIES, CATEGORIES, CATEGORY_INSTRUCTIONS, normalize_category
+from extraction.embedding_cache import QueryEmbeddingCache
+from extraction.embeddings import (
+    backend_requires_api_key, check_index_backend, check_index_dimensions, embedding_identity, make_embeddings
+)
+from extraction.retrieval import select_category_store
+from extraction.merging import entry_key, merge_entries
+from extraction.routing import route_categories
+from extraction.rate_limit import retry_async, retry_sync
+from extraction.stream_parser import EntryStreamParser, parse_partial
+from concurrent.futures import ThreadPoolExecutor
+from env import load_env
+from metrics import log_payload, metrics
 from logger import setup_logger
+import asyncio
+import itertools
 import json
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+import time
+import weakref
 
 logger = setup_logger('llm_extractor')
 
+MODEL_NAME = "gemini-1.5-flash"
+TEMPERATURE = 0.3
+FAISS_INDEX_PATH = "rag/example_index.faiss"
+PROMPT_PATH = "rag/prompt.txt"
+
+# Appended to the original prompt when only part of an answer could be parsed
+CONTINUATION_PROMPT = (
+    "\n\nYour previous answer was cut off or malformed after {count} complete entries. "
+    "The last complete entry was:\n{last}\n"
+    "Respond with ONLY a JSON array of the remaining entries that follow it, or [] if there are none."
+)
+
+def token_counts(response, formatted_prompt):
+    """Prompt/response token counts from provider usage metadata, else a character-based estimate."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {
+        "prompt_tokens": usage.get("input_tokens") or estimate_tokens(formatted_prompt),
+        "response_tokens": usage.get("output_tokens") or estimate_tokens(response.content),
+    }
+
+def llm_identity(llm):
+    """Return (model name, temperature) of a chat model; models without a name report their type."""
+    model = (getattr(llm, "model", None) or getattr(llm, "model_name", None)
+             or getattr(llm, "_llm_type", None) or type(llm).__name__)
+    # Gemini clients may report "models/<name>"; keep keys the same as for the bare name
+    return model.removeprefix("models/"), getattr(llm, "temperature", None)
+
 class LLMExtractor:
-    def __init__(self, api_key=None, category=None, faiss_index_path="rag/example_index.faiss"):
+    def __init__(self, api_key=None, category=None, faiss_index_path=FAISS_INDEX_PATH, response_cache=None,
+                 token_budget=None, max_prompt_tokens=None, max_workers=4, prompt_path=PROMPT_PATH,
+                 vector_store=None, embedding_cache=None, min_category_examples=3, llm=None, embeddings=None,
+                 rate_limiter=None, max_retries=5, max_continuations=2, embedding_backend=None, route=True,
+                 max_concurrent_calls=8):
         self.category = category
+        # ALL_CATEGORIES extracts every category in one call, labelling each entry with its own
+        self.all_categories = category == ALL_CATEGORIES
+        # In that mode, only include instructions for the categories keyword routing finds in the text
+        self.route = route
+        self.prompt_path = prompt_path
+        self.response_cache = response_cache
+        # When set, only the most synthesis-relevant chunks within this many tokens are sent
+        self.token_budget = token_budget
+        # Texts longer than this are extracted chunk-by-chunk in parallel and merged
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Follow-up requests for the missing tail of a truncated or malformed answer
+        self.max_continuations = max_continuations
+        # Cap on async LLM calls in flight per event loop, across papers and map-reduce windows
+        self.max_concurrent_calls = max_concurrent_calls
+        self._call_semaphores = weakref.WeakKeyDictionary()
+        if not api_key:
+            load_env()
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        # Injected models (e.g. extraction.fakes.FakeChatModel) and local embeddings need no API key
+        needs_key = llm is None or (embeddings is None and backend_requires_api_key(embedding_backend))
+        if not self.api_key and needs_key:
             logger.error("GEMINI_API_KEY not found in .env file or environment variables")
             raise ValueError("GEMINI_API_KEY not found in .env file or environment variables")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
+        self.llm = llm if llm is not None else ChatGoogleGenerativeAI(
+            model=MODEL_NAME,
             google_api_key=self.api_key,
-            temperature=0.3
+            temperature=TEMPERATURE
         )
-        self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=self.api_key)
-        self.vector_store = self.load_vector_store(faiss_index_path)
-        self.prompt_template = self.load_prompt_template()
+        # Cache keys and metrics name the model actually called, including injected ones
+        self.model_name, self.temperature = llm_identity(self.llm)
+        # The backend (EMBEDDING_BACKEND or ``embedding_backend``) must match the one that built the index
+        self.embeddings = embeddings if embeddings is not None else make_embeddings(
+            embedding_backend, api_key=self.api_key, index_path=faiss_index_path
+        )
+        self.embedding_model = embedding_identity(self.embeddings)[1]
+        # Query embeddings are cached by content hash; pass QueryEmbeddingCache(path=None) for memory only
+        self.embedding_cache = embedding_cache if embedding_cache is not None else QueryEmbeddingCache()
+        # An already-loaded index can be shared between extractors for different categories
+        self.vector_store = vector_store if vector_store is not None else self.load_vector_store(faiss_index_path)
+        # Search only this category's examples when it has enough of them
+        self.category_store = select_category_store(
+            self.vector_store, None if self.all_categories else category, min_category_examples
+        )
+        self._templates = {}
+        self.prompt_template = self.load_prompt_template(CATEGORIES if self.all_categories else None)
     
     def load_vector_store(self, faiss_index_path):
         """Load precomputed FAISS index for RAG examples."""
+        check_index_backend(faiss_index_path, self.embeddings)
         try:
             vector_store = FAISS.load_local(faiss_index_path, self.embeddings, allow_dangerous_deserialization=True)
             logger.info("Loaded FAISS vector store")
-            return vector_store
         except Exception as e:
             logger.error(f"Error loading FAISS index: {str(e)}")
             raise
+        check_index_dimensions(vector_store, self.embeddings)
+        return vector_store
     
-    def load_prompt_template(self):
-        """Load and customize the prompt template based on category."""
+    def load_prompt_template(self, categories=None):
+        """Load and customize the prompt template based on category.
+        
+        With ``categories`` (all-categories mode) the template asks for a per-entry category
+        label from that list and carries only those categories' instructions.
+        """
+        categories = tuple(categories) if categories else None
+        if categories in self._templates:
+            return self._templates[categories]
         try:
-            with open("rag/prompt.txt", "r") as f:
+            with open(self.prompt_path, "r") as f:
                 base_template = f.read()
             
             # Log raw prompt template for debugging
-            logger.info(f"Raw prompt template: {base_template[:500]}...")  # Truncate for brevity
+            log_payload(logger, "Raw prompt template", base_template)
             
-            category_instructions = {
-                "Metal Oxides": "Focus on parameters like precursor (e.g., zinc nitrate, ammonium carbonate, aluminum nitrate), temperature (e.g., 100-240°C), pH (e.g., 6-8 or null), solvent (e.g., deionized water), and methods like hydrothermal, sol-gel, or calcination.",
-                "Metal Sulfides": "Focus on parameters like sulfur source (e.g., thiourea), temperature (e.g., 150-300°C), solvent, and methods like chemical vapor deposition, solvothermal, or precipitation.",
-                "Metal-Organic Frameworks": "Focus on parameters like metal ion (e.g., zinc, copper), organic linker (e.g., terephthalic acid), solvent (e.g., DMF), temperature (e.g., 100-150°C), and methods like solvothermal or microwave-assisted synthesis.",
-                "Carbon-based": "Focus on parameters like carbon source (e.g., methane, glucose), temperature (e.g., 700-1000°C), catalyst, and methods like chemical vapor deposition, arc discharge, or pyrolysis.",
-                "Polymeric Nanomaterials": "Focus on parameters like monomer (e.g., styrene), initiator (e.g., AIBN), solvent, temperature (e.g., 60-80°C), and methods like emulsion polymerization or electrospinning.",
-                "Pure Metals / Alloys": "Focus on parameters like metal precursor (e.g., gold chloride), reduction agent (e.g., sodium borohydride), temperature (e.g., 20-100°C), and methods like chemical reduction or electrodeposition."
-            }
-            
-            instruction = category_instructions.get(self.category, "Extract relevant synthesis parameters.")
+            if categories:
+                # The single-category wording (set to "{category}") would be copied verbatim as the label
+                base_template = base_template.replace('(set to "{category}")', "(one of the categories listed at the end)")
+                base_template = base_template.replace("for {category} nanomaterials",
+                                                      "for nanomaterials of the categories listed at the end")
+                choices = ", ".join(f'"{category}"' for category in categories)
+                instruction = (
+                    f'The text may describe several material categories. Set each entry\'s "category" to '
+                    f"exactly one of {choices}, whichever its material belongs to, and follow that category's "
+                    "guidance:\n" + "\n".join(f"- {c}: {CATEGORY_INSTRUCTIONS[c]}" for c in categories)
+                )
+            else:
+                instruction = CATEGORY_INSTRUCTIONS.get(self.category, "Extract relevant synthesis parameters.")
             template = base_template + "\nCategory-specific instructions: " + instruction
-            logger.info(f"Loaded prompt template for {self.category}")
+            logger.info(f"Loaded prompt template for {', '.join(categories) if categories else self.category}")
             
-            return PromptTemplate(
+            self._templates[categories] = PromptTemplate(
                 input_variables=["category", "text", "examples"],
                 template=template
             )
+            return self._templates[categories]
         except Exception as e:
             logger.error(f"Error loading prompt template: {str(e)}")
             raise
     
-    def extract_parameters(self, text):
-        """Extract synthesis parameters using the LLM and RAG."""
+    def extract_parameters(self, text, max_workers=None):
+        """Extract synthesis parameters using the LLM and RAG.
+        
+        ``max_workers`` overrides the extractor's map-reduce parallelism for this call; callers
+        that already run papers concurrently pass 1 so their own limit bounds the LLM calls.
+        """
+        if self.token_budget:
+            text = select_relevant_chunks(text, self.token_budget)
+        if self.max_prompt_tokens and estimate_tokens(text) > self.max_prompt_tokens:
+            return self.extract_parameters_map_reduce(text, max_workers=max_workers)
+        return self.extract_from_text(text)
+    
+    def split_windows(self, text, max_chunk_tokens=None):
+        """Split text into windows of at most ``max_chunk_tokens`` (default ``max_prompt_tokens``) tokens."""
+        max_chunk_tokens = max_chunk_tokens or self.max_prompt_tokens
+        # Chunks must fit the budget on their own, or a single chunk could overflow its window
+        max_chunk_chars = max(1, min(1500, (max_chunk_tokens - 1) * 4))
+        return group_chunks(split_into_chunks(text, max_chunk_chars), max_chunk_tokens)
+    
+    def extract_parameters_map_reduce(self, text, max_chunk_tokens=None, max_workers=None):
+        """Extract from chunk windows concurrently (map) and deduplicate the merged entries (reduce)."""
         try:
-            # Retrieve relevant examples using FAISS
-            docs = self.vector_store.similarity_search(text, k=3)
-            examples = "\n".join([doc.page_content for doc in docs])
-            logger.info("Retrieved relevant examples for RAG")
-            
-            # Create a runnable sequence
-            chain = RunnableSequence(self.prompt_template | self.llm)
-            
-            # Run the chain
-            inputs = {"category": self.category, "text": text, "examples": examples}
+            windows = self.split_windows(text, max_chunk_tokens)
+            max_workers = max_workers or self.max_workers
+            logger.info(f"Map-reduce extraction over {len(windows)} windows")
+            if max_workers == 1:
+                entry_lists = [self.extract_window(window) for window in windows]
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    entry_lists = list(pool.map(self.extract_window, windows))
+            entries = merge_entries(entry_lists)
+            logger.info(f"Merged {sum(len(e) for e in entry_lists)} entries into {len(entries)}")
+            return entries
+        except Exception as e:
+            logger.error(f"Error during map-reduce extraction: {str(e)}")
+            raise
+    
+    def extract_window(self, window):
+        """Extract one map-reduce window; a failure becomes an error entry so other windows are kept."""
+        try:
+            return self.extract_from_text(window)
+        except Exception as e:
+            return [{"error": str(e)}]
+    
+    def retrieve_examples(self, text, k=3):
+        """Retrieve few-shot examples using a compact, cached query built from the paper text."""
+        with metrics.span("retrieval", category=self.category) as span:
+            query = build_retrieval_query(text)
+            if getattr(self.embeddings, "local", False):
+                # Local embeddings are cheaper to recompute than to look up
+                vector = self.embeddings.embed_query(query)
+            else:
+                hits_before = self.embedding_cache.hits
+                vector = self.embedding_cache.get_or_embed(self.embedding_model, query, self.embeddings.embed_query)
+                span["embedding_cache_hit"] = self.embedding_cache.hits > hits_before
+            return self.category_store.similarity_search_by_vector(vector, k=k)
+    
+    def build_prompt(self, text):
+        """Retrieve examples and return the prompt template, chain inputs and fully formatted prompt."""
+        # Retrieve relevant examples using FAISS
+        docs = self.retrieve_examples(text)
+        examples = "\n".join([doc.page_content for doc in docs])
+        logger.info("Retrieved relevant examples for RAG")
+        
+        prompt_template, category = self.prompt_template, self.category
+        if self.all_categories:
+            categories = route_categories(text) if self.route else CATEGORIES
+            # The all-categories template has no {category} slot; the allowed labels are listed in it
+            prompt_template, category = self.load_prompt_template(categories), ALL_CATEGORIES
+        inputs = {"category": category, "text": text, "examples": examples}
+        with metrics.span("prompt_build", category=self.category) as span:
             try:
-                formatted_prompt = self.prompt_template.format(**inputs)
-                logger.info(f"Formatted prompt: {formatted_prompt[:500]}...")  # Truncate for brevity
+                formatted_prompt = prompt_template.format(**inputs)
+                log_payload(logger, "Formatted prompt", formatted_prompt)
             except Exception as e:
                 logger.error(f"Failed to format prompt: {str(e)}")
                 raise
+            span["prompt_tokens"] = estimate_tokens(formatted_prompt)
+        return prompt_template, inputs, formatted_prompt
+    
+    def lookup_response(self, formatted_prompt):
+        """Return (cache key, cached response or None) for a formatted prompt."""
+        # Reuse a previous answer to a byte-identical prompt when caching is enabled
+        if self.response_cache is None:
+            return None, None
+        cache_key = self.response_cache.make_key(self.model_name, self.temperature, formatted_prompt)
+        response_content = self.response_cache.get(cache_key)
+        if response_content is not None:
+            logger.info("LLM response cache hit")
+            metrics.incr("llm_cache_hits", stage="llm_call")
+        else:
+            metrics.incr("llm_cache_misses", stage="llm_call")
+        return cache_key, response_content
+    
+    def accept_response(self, response_content, cache_key=None, cache_hit=False):
+        """Parse a well-formed response into entries, caching it if it was fresh.
+        
+        Returns None if the response is not valid JSON, so the caller can salvage it.
+        """
+        try:
+            with metrics.span("parse", category=self.category) as span:
+                entries = self.parse_response(response_content)
+                span["entries"] = len(entries)
+        except json.JSONDecodeError as e:
+            logger.warning(f"LLM response is not valid JSON, salvaging complete entries: {str(e)}")
+            log_payload(logger, "Full response", response_content)
+            return None
+        
+        # Only well-formed responses are cached so a bad answer is retried next run
+        if cache_key is not None and not cache_hit:
+            self.response_cache.put(cache_key, self.model_name, response_content)
+        logger.info(f"Extracted {len(entries)} synthesis entries")
+        return entries
+    
+    def finish_response(self, response_content, cache_key=None, cache_hit=False, formatted_prompt=None):
+        """Parse a response into entries, caching it if it was fresh and well-formed.
+        
+        A response that is not valid JSON keeps its complete entries; given the prompt,
+        only the missing tail is re-requested.
+        """
+        entries = self.accept_response(response_content, cache_key, cache_hit)
+        if entries is not None:
+            return entries
+        raw_entries, complete = self.complete_entries(*parse_partial(response_content), formatted_prompt)
+        return self.finish_entries(raw_entries, complete, cache_key)
+    
+    async def afinish_response(self, response_content, cache_key=None, cache_hit=False, formatted_prompt=None,
+                               semaphore=None):
+        """Async finish_response; continuation calls share the rate limiter and call semaphore."""
+        entries = self.accept_response(response_content, cache_key, cache_hit)
+        if entries is not None:
+            return entries
+        raw_entries, complete = await self.acomplete_entries(*parse_partial(response_content), formatted_prompt,
+                                                             semaphore)
+        return self.finish_entries(raw_entries, complete, cache_key)
+    
+    def finish_entries(self, raw_entries, complete, cache_key=None):
+        """Clean salvaged entries, caching them only once the answer is complete."""
+        if not raw_entries and not complete:
+            logger.error("No complete entries could be parsed from the LLM response")
+            return [{"error": "Invalid response format"}]
+        if complete and cache_key is not None:
+            self.response_cache.put(cache_key, self.model_name, json.dumps(raw_entries, ensure_ascii=False))
+        if not complete:
+            logger.warning(f"Keeping {len(raw_entries)} entries from an incomplete LLM response")
+        return [self.clean_entry(dict(entry)) for entry in raw_entries]
+    
+    @staticmethod
+    def continuation_prompt(formatted_prompt, raw_entries):
+        """Return the prompt asking for only the entries after the last complete one."""
+        last = json.dumps(raw_entries[-1], ensure_ascii=False) if raw_entries else "(none)"
+        return formatted_prompt + CONTINUATION_PROMPT.format(count=len(raw_entries), last=last)
+    
+    def request_tail(self, formatted_prompt, raw_entries):
+        """Ask for only the entries after the last complete one; returns (entries, complete)."""
+        prompt = self.continuation_prompt(formatted_prompt, raw_entries)
+        with metrics.span("llm_call", category=self.category, model=self.model_name, continuation=True) as span:
+            response = retry_sync(lambda: self.llm.invoke(prompt), self.max_retries)
+            span.update(token_counts(response, prompt))
+        log_payload(logger, "Continuation response", response.content)
+        return parse_partial(response.content)
+    
+    async def arequest_tail(self, formatted_prompt, raw_entries, semaphore=None):
+        """Async request_tail, rate limited and bounded like the first call."""
+        prompt = self.continuation_prompt(formatted_prompt, raw_entries)
+        with metrics.span("llm_call", category=self.category, model=self.model_name, continuation=True) as span:
+            response = await self.alimited_call(lambda: self.llm.ainvoke(prompt), estimate_tokens(prompt), semaphore)
+            span.update(token_counts(response, prompt))
+        log_payload(logger, "Continuation response", response.content)
+        return parse_partial(response.content)
+    
+    @staticmethod
+    def add_new_entries(raw_entries, more, seen):
+        """Return ``raw_entries`` plus the entries of ``more`` whose keys are not in ``seen`` (updated)."""
+        new = []
+        for entry in more:
+            key = entry_key(entry)
+            if key not in seen:
+                seen.add(key)
+                new.append(entry)
+        return raw_entries + new
+    
+    def complete_entries(self, raw_entries, complete, formatted_prompt=None):
+        """Re-request the missing tail of an incomplete answer up to ``max_continuations`` times.
+        
+        A continuation that still fails after its retries is logged and ends the attempts;
+        the entries salvaged so far are returned as incomplete rather than lost. Models often
+        restart the list from the beginning, so entries already salvaged are dropped.
+        """
+        attempts = 0
+        seen = {entry_key(entry) for entry in raw_entries}
+        while not complete and formatted_prompt is not None and attempts < self.max_continuations:
+            attempts += 1
+            try:
+                more, complete = self.request_tail(formatted_prompt, raw_entries)
+            except Exception as e:
+                logger.error(f"Continuation {attempts} failed; keeping {len(raw_entries)} entries: {str(e)}")
+                return raw_entries, False
+            before = len(raw_entries)
+            raw_entries = self.add_new_entries(raw_entries, more, seen)
+            logger.info(f"Continuation {attempts} returned {len(more)} entries, {len(raw_entries) - before} new")
+        return raw_entries, complete
+    
+    async def acomplete_entries(self, raw_entries, complete, formatted_prompt=None, semaphore=None):
+        """Async complete_entries; each continuation waits for the rate limiter and a call slot."""
+        attempts = 0
+        seen = {entry_key(entry) for entry in raw_entries}
+        while not complete and formatted_prompt is not None and attempts < self.max_continuations:
+            attempts += 1
+            try:
+                more, complete = await self.arequest_tail(formatted_prompt, raw_entries, semaphore)
+            except Exception as e:
+                logger.error(f"Continuation {attempts} failed; keeping {len(raw_entries)} entries: {str(e)}")
+                return raw_entries, False
+            before = len(raw_entries)
+            raw_entries = self.add_new_entries(raw_entries, more, seen)
+            logger.info(f"Continuation {attempts} returned {len(more)} entries, {len(raw_entries) - before} new")
+        return raw_entries, complete
+    
+    def extract_from_text(self, text):
+        """Run a single extraction prompt over the given text."""
+        try:
+            prompt_template, inputs, formatted_prompt = self.build_prompt(text)
+            cache_key, response_content = self.lookup_response(formatted_prompt)
+            cache_hit = response_content is not None
             
-            response = chain.invoke(inputs)
+            if not cache_hit:
+                # Create a runnable sequence and run the chain, retrying transient errors
+                chain = RunnableSequence(prompt_template | self.llm)
+                with metrics.span("llm_call", category=self.category, model=self.model_name) as span:
+                    response = retry_sync(lambda: chain.invoke(inputs), self.max_retries)
+                    response_content = response.content
+                    span.update(token_counts(response, formatted_prompt))
+                log_payload(logger, "Full LLM response", response_content)
             
-            # Log raw response for debugging
-            logger.info(f"Raw LLM response: {response.content[:500]}...")  # Truncate for brevity
-            logger.info(f"Full LLM response: {response.content}")  # Log full response
+            return self.finish_response(response_content, cache_key, cache_hit, formatted_prompt)
+        except Exception as e:
+            logger.error(f"Error during parameter extraction: {str(e)}")
+            raise
+    
+    def stream_from_text(self, text):
+        """Stream one extraction, yielding each entry as soon as it parses.
+        
+        If the stream breaks off or turns malformed, entries already yielded stand and only
+        the missing tail is re-requested.
+        """
+        prompt_template, inputs, formatted_prompt = self.build_prompt(text)
+        cache_key, response_content = self.lookup_response(formatted_prompt)
+        if response_content is not None:
+            yield from self.finish_response(response_content, cache_key, cache_hit=True)
+            return
+        
+        chain = RunnableSequence(prompt_template | self.llm)
+        parser = EntryStreamParser()
+        message = None
+        with metrics.span("llm_call", category=self.category, model=self.model_name, streamed=True) as span:
+            start = time.perf_counter()
+            # Failures before the first chunk are retried like any other call; later ones are salvaged
+            chunks = retry_sync(lambda: self.open_stream(chain, inputs), self.max_retries)
+            try:
+                for chunk in chunks:
+                    message = chunk if message is None else message + chunk
+                    for entry in parser.feed(chunk.content):
+                        span.setdefault("first_entry_s", time.perf_counter() - start)
+                        yield self.clean_entry(dict(entry))
+            except Exception as e:
+                logger.warning(f"LLM stream failed after {len(parser.entries)} entries: {str(e)}")
+            if message is not None:
+                span.update(token_counts(message, formatted_prompt))
+        if message is not None:
+            log_payload(logger, "Full LLM response", message.content)
+        
+        streamed = len(parser.entries)
+        raw_entries, complete = self.complete_entries(parser.entries, parser.close(), formatted_prompt)
+        if complete and cache_key is not None:
+            self.response_cache.put(cache_key, self.model_name, json.dumps(raw_entries, ensure_ascii=False))
+        if not raw_entries and not complete:
+            logger.error("No complete entries could be parsed from the LLM stream")
+            yield {"error": "Invalid response format"}
+        for entry in raw_entries[streamed:]:
+            yield self.clean_entry(dict(entry))
+    
+    @staticmethod
+    def open_stream(chain, inputs):
+        """Start streaming ``chain`` and return an iterator over its chunks, first chunk included."""
+        chunks = iter(chain.stream(inputs))
+        first = next(chunks, None)
+        return chunks if first is None else itertools.chain([first], chunks)
+    
+    def stream_parameters(self, text, max_workers=None):
+        """Streaming variant of extract_parameters; map-reduce papers yield once all windows are merged."""
+        if self.token_budget:
+            text = select_relevant_chunks(text, self.token_budget)
+        if self.max_prompt_tokens and estimate_tokens(text) > self.max_prompt_tokens:
+            yield from self.extract_parameters_map_reduce(text, max_workers=max_workers)
+            return
+        yield from self.stream_from_text(text)
+    
+    async def aextract_from_text(self, text, semaphore=None):
+        """Async variant of extract_from_text with rate limiting and retry/backoff."""
+        try:
+            # Retrieval and prompt formatting are blocking; keep them off the event loop
+            prompt_template, inputs, formatted_prompt = await asyncio.to_thread(self.build_prompt, text)
+            cache_key, response_content = self.lookup_response(formatted_prompt)
+            cache_hit = response_content is not None
             
-            # Strip Markdown code block markers if present
-            response_content = response.content.strip()
-            if response_content.startswith("```json") and response_content.endswith("```"):
-                response_content = response_content[7:-3].strip()
-            elif response_content.startswith("```") and response_content.endswith("```"):
-                response_content = response_content[3:-3].strip()
+            if not cache_hit:
+                chain = RunnableSequence(prompt_template | self.llm)
+                with metrics.span("llm_call", category=self.category, model=self.model_name) as span:
+                    response = await self.alimited_call(lambda: chain.ainvoke(inputs),
+                                                        estimate_tokens(formatted_prompt), semaphore)
+                    response_content = response.content
+                    span.update(token_counts(response, formatted_prompt))
+                log_payload(logger, "Full LLM response", response_content)
             
-            # Parse the response (assuming JSON-like output)
-            try:
-                entries = json.loads(response_content)
-                if not isinstance(entries, list):
-                    entries = [entries]
-                # Ensure category is set correctly and handle Unicode characters
-                for entry in entries:
-                    entry["category"] = self.category
-                    # Process string fields to handle Unicode escapes and special characters
-                    for key in ["precursor", "temperature", "method", "solvent", "reaction_time", "text_snippet"]:
-                        if isinstance(entry.get(key), str):
-                            try:
-                                # Replace common Unicode escape sequences with literal characters
-                                value = entry[key]
-                                value = value.replace("\\u00b0", "°").replace("\\u22c5", "⋅")
-                                # Handle potential double-encoded UTF-8 (e.g., \u00c2\u00b0)
-                                if "Â" in value or "â" in value:
-                                    value = value.encode('latin1', errors='ignore').decode('utf-8', errors='ignore')
-                                entry[key] = value
-                            except Exception as e:
-                                logger.warning(f"Failed to decode Unicode for {key}: {str(e)}")
-                                entry[key] = entry[key]  # Keep original value if decoding fails
-                logger.info(f"Extracted {len(entries)} synthesis entries")
-                return entries
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
-                logger.error(f"Full response: {response_content}")
-                return [{"error": "Invalid response format"}]
+            return await self.afinish_response(response_content, cache_key, cache_hit, formatted_prompt, semaphore)
         except Exception as e:
-            logger.error(f"Error during parameter extraction: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error(f"Error during async parameter extraction: {str(e)}")
+            raise
+    
+    async def aextract_parameters(self, text, semaphore=None):
+        """Async variant of extract_parameters; map-reduce windows run concurrently."""
+        if self.token_budget:
+            text = select_relevant_chunks(text, self.token_budget)
+        if self.max_prompt_tokens and estimate_tokens(text) > self.max_prompt_tokens:
+            windows = self.split_windows(text)
+            results = await asyncio.gather(*(self.aextract_from_text(window, semaphore) for window in windows),
+                                           return_exceptions=True)
+            # A failed window becomes an error entry, tagged with its index by merge_entries
+            entry_lists = [[{"error": str(result)}] if isinstance(result, Exception) else result
+                           for result in results]
+            return merge_entries(entry_lists)
+        return await self.aextract_from_text(text, semaphore)
+    
+    async def alimited_call(self, invoke, prompt_tokens, semaphore=None):
+        """Await ``invoke()`` holding a call slot and rate-limiter capacity, retrying transient errors."""
+        async def call():
+            # Held per attempt only, so backoff sleeps do not occupy a slot
+            async with semaphore or self.call_semaphore():
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(prompt_tokens)
+                return await invoke()
+        
+        return await retry_async(call, self.max_retries)
+    
+    def call_semaphore(self):
+        """Return the running event loop's semaphore bounding LLM calls to ``max_concurrent_calls``."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._call_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._call_semaphores[loop] = asyncio.Semaphore(self.max_concurrent_calls)
+        return semaphore
+    
+    async def aextract_many(self, texts, concurrency=None):
+        """Extract from many texts with at most ``concurrency`` LLM calls in flight.
+        
+        The limit applies to individual calls, so long papers split into map-reduce
+        windows share it. With ``concurrency`` the limit is private to this call; otherwise
+        the extractor's shared ``max_concurrent_calls`` semaphore is used. Returns one entry
+        list per text, in order; a text whose extraction fails yields a single error entry
+        instead of aborting the others.
+        """
+        # A shared (registry) extractor's own limit is never changed by one caller
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else self.call_semaphore()
+        
+        async def run(text):
+            try:
+                return await self.aextract_parameters(text, semaphore)
+            except Exception as e:
+                return [{"error": str(e)}]
+        
+        return await asyncio.gather(*(run(text) for text in texts))
+    
+    def parse_response(self, response_content):
+        """Parse a raw LLM response into synthesis entries; raises json.JSONDecodeError on bad output."""
+        # Strip Markdown code block markers if present
+        response_content = response_content.strip()
+        if response_content.startswith("```json") and response_content.endswith("```"):
+            response_content = response_content[7:-3].strip()
+        elif response_content.startswith("```") and response_content.endswith("```"):
+            response_content = response_content[3:-3].strip()
+        
+        # Parse the response (assuming JSON-like output)
+        entries = json.loads(response_content)
+        if not isinstance(entries, list):
+            entries = [entries]
+        return [self.clean_entry(entry) for entry in entries]
+    
+    def clean_entry(self, entry):
+        """Set the extractor's category on an entry and repair Unicode in its string fields.
+        
+        In all-categories mode the model's own label is kept, mapped onto CATEGORIES.
+        """
+        if self.all_categories:
+            label = entry.get("category")
+            entry["category"] = normalize_category(label)
+            if entry["category"] is None:
+                logger.warning(f"Could not map category label {label!r} onto a known category")
+        else:
+            entry["category"] = self.category
+        # Process string fields to handle Unicode escapes and special characters
+        for key in ["precursor", "temperature", "method", "solvent", "reaction_time", "text_snippet"]:
+            if isinstance(entry.get(key), str):
+                try:
+                    # Replace common Unicode escape sequences with literal characters
+                    value = entry[key]
+                    value = value.replace("\\u00b0", "°").replace("\\u22c5", "⋅")
+                    # Handle potential double-encoded UTF-8 (e.g., \u00c2\u00b0)
+                    if "Â" in value or "â" in value:
+                        value = value.encode('latin1', errors='ignore').decode('utf-8', errors='ignore')
+                    entry[key] = value
+                except Exception as e:
+                    logger.warning(f"Failed to decode Unicode for {key}: {str(e)}")
+                    entry[key] = entry[key]  # Keep original value if decoding fails
+        return entry
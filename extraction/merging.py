@@ -0,0 +1,42 @@
+import re
+
+# Fields that identify a synthesis route when deduplicating entries from different chunks;
+# category keeps same-looking routes for different material classes apart in all-categories mode
+IDENTITY_FIELDS = ("category", "precursor", "method", "temperature")
+
+def normalize_value(value):
+    """Normalize a field value for comparison: lowercase, unify degree signs, collapse spaces."""
+    if value is None:
+        return ""
+    value = str(value).lower().replace("º", "°").replace("degc", "°c")
+    value = re.sub(r"\s*°\s*c", "°c", value)
+    value = re.sub(r"[^\w°.\-]+", " ", value)
+    return " ".join(value.split())
+
+def entry_key(entry, fields=IDENTITY_FIELDS):
+    """Return the deduplication key for an entry."""
+    return tuple(normalize_value(entry.get(field)) for field in fields)
+
+def merge_entries(entry_lists, fields=IDENTITY_FIELDS):
+    """Merge entries extracted from several chunks, collapsing duplicates of the same route.
+
+    Duplicates keep the first entry's values and fill its missing fields from later ones.
+    Error entries are kept after the merged entries, tagged with the ``window`` (index in
+    ``entry_lists``) they came from, so a failed chunk is visible in the output.
+    """
+    merged = {}
+    errors = []
+    for window, entries in enumerate(entry_lists):
+        for entry in entries:
+            if "error" in entry:
+                errors.append(dict(entry, window=window))
+                continue
+            key = entry_key(entry, fields)
+            if key not in merged:
+                merged[key] = dict(entry)
+                continue
+            existing = merged[key]
+            for field, value in entry.items():
+                if existing.get(field) in (None, "", "null") and value not in (None, "", "null"):
+                    existing[field] = value
+    return list(merged.values()) + errors
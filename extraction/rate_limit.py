@@ -0,0 +1,93 @@
+import asyncio
+import random
+import time
+from logger import setup_logger
+
+logger = setup_logger('rate_limit')
+
+# Exception class names raised by the Gemini/Google clients for transient failures
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TooManyRequests", "TimeoutError", "ReadTimeout", "ConnectTimeout", "ConnectionError",
+}
+RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "rate limit", "resource exhausted", "timed out", "timeout")
+
+class AsyncTokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute`` up to ``capacity``."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until ``amount`` tokens are available and take them."""
+        # Requests larger than the bucket would never fit; clamp so they drain it instead
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied before each LLM call."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = AsyncTokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = AsyncTokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, tokens=0):
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            await self.tokens.acquire(tokens)
+
+def is_retryable(error):
+    """Return True for rate-limit, timeout and transient server errors."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status in (429, 500, 502, 503, 504):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Full-jitter exponential backoff delay for the given (zero-based) attempt."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def retry_sync(func, max_retries=5, base_delay=1.0, max_delay=60.0):
+    """Call ``func()``, retrying retryable errors with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"Retryable error ({type(e).__name__}: {str(e)}); retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+async def retry_async(func, max_retries=5, base_delay=1.0, max_delay=60.0):
+    """Await ``func()``, retrying retryable errors with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"Retryable error ({type(e).__name__}: {str(e)}); retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
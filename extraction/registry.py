@@ -0,0 +1,85 @@
+import os
+import threading
+from extraction.embeddings import configured_backend
+from extraction.llm_extractor import FAISS_INDEX_PATH, PROMPT_PATH, LLMExtractor
+from logger import setup_logger
+
+logger = setup_logger('extractor_registry')
+
+_registry_lock = threading.Lock()
+_key_locks = {}
+# (category, index path, prompt path, embeddings, other kwargs) -> (file signature, extractor)
+_extractors = {}
+
+def _value_key(value):
+    """Hashable stand-in for a keyword argument: the value itself, or its identity."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("id", id(value))
+
+def _extractor_key(category, faiss_index_path, prompt_path, kwargs):
+    """Registry key covering everything that changes what an extractor does.
+
+    The embeddings element (resolved backend, injected embeddings) decides which loaded
+    indexes may be shared, since a store is bound to the embeddings it was loaded with.
+    """
+    embeddings = (configured_backend(kwargs.get("embedding_backend")), _value_key(kwargs.get("embeddings")))
+    others = tuple(sorted((name, _value_key(value)) for name, value in kwargs.items()
+                          if name not in ("embedding_backend", "embeddings")))
+    return category, faiss_index_path, prompt_path, embeddings, others
+
+def _file_signature(faiss_index_path, prompt_path):
+    """Return the mtimes of the index files and prompt file, used to detect changes on disk."""
+    paths = [prompt_path]
+    if os.path.isdir(faiss_index_path):
+        paths.extend(os.path.join(faiss_index_path, name) for name in sorted(os.listdir(faiss_index_path)))
+    else:
+        paths.append(faiss_index_path)
+    signature = []
+    for path in paths:
+        try:
+            signature.append((path, os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None))
+    return tuple(signature)
+
+def _shared_vector_store(key, signature):
+    """Return an already-loaded vector store for the same index files and embeddings, if any."""
+    for cached_key, (cached_signature, extractor) in list(_extractors.items()):
+        if (cached_key[1], cached_key[3]) == (key[1], key[3]) and cached_signature[1:] == signature[1:]:
+            return extractor.vector_store
+    return None
+
+def get_extractor(category, faiss_index_path=FAISS_INDEX_PATH, prompt_path=PROMPT_PATH, **kwargs):
+    """Return a process-wide LLMExtractor for these arguments, loading it lazily.
+
+    Extractors are keyed by category, index path, prompt path, embedding backend and the
+    extra keyword arguments (unhashable values by identity), so different settings never
+    share an instance. The extractor is rebuilt when the index or prompt file changes on
+    disk. Extractors with the same index and embeddings share one loaded FAISS index.
+    """
+    key = _extractor_key(category, faiss_index_path, prompt_path, kwargs)
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        signature = _file_signature(faiss_index_path, prompt_path)
+        cached = _extractors.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if cached is not None:
+            logger.info(f"Index or prompt changed on disk; reloading extractor for {category}")
+        with _registry_lock:
+            vector_store = _shared_vector_store(key, signature)
+        extractor = LLMExtractor(category=category, faiss_index_path=faiss_index_path, prompt_path=prompt_path,
+                                 vector_store=vector_store, **kwargs)
+        with _registry_lock:
+            _extractors[key] = (signature, extractor)
+        logger.info(f"Registered extractor for {category} ({faiss_index_path})")
+        return extractor
+
+def clear_extractors():
+    """Drop all cached extractors so the next lookup reloads from disk."""
+    with _registry_lock:
+        _extractors.clear()
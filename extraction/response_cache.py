@@ -0,0 +1,111 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from logger import setup_logger
+
+logger = setup_logger('response_cache')
+
+DEFAULT_CACHE_PATH = "cache/llm_responses.sqlite"
+# Pruning frees space down to this fraction of max_entries so the next puts do not prune again
+PRUNE_TO_FRACTION = 0.9
+# Puts between prunes, which recount entries written by other processes and expire old ones
+PRUNE_EVERY = 1000
+
+class ResponseCache:
+    """Persistent SQLite cache of raw LLM responses keyed on model, temperature and prompt.
+
+    Entries older than ``ttl_seconds`` are treated as misses, and the least recently used
+    entries are pruned once more than ``max_entries`` are stored. The entry count is tracked
+    incrementally, so the table is only pruned when that count crosses the limit or every
+    ``PRUNE_EVERY`` puts. Hit and miss counts are kept per instance for reporting.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=None, max_entries=100000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        self._puts_since_prune = 0
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        """Return the cache key for a model, temperature and fully formatted prompt."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{model}:{temperature}:{prompt_hash}"
+
+    def get(self, key):
+        """Return the cached response text for a key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response):
+        """Store a response, pruning old entries if the cache has grown past ``max_entries``."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            # Replacing an existing key over-counts; the next prune recounts
+            self._entries += 1
+            self._puts_since_prune += 1
+            if self._entries > self.max_entries or self._puts_since_prune >= PRUNE_EVERY:
+                self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now):
+        """Expire entries past the TTL and, above ``max_entries``, drop the least recently used
+        down to ``PRUNE_TO_FRACTION`` of the limit. Called with the lock held."""
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if self._entries > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (int(self.max_entries * PRUNE_TO_FRACTION),),
+            )
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            logger.info(f"Pruned LLM response cache down to {self._entries} entries")
+        self._puts_since_prune = 0
+
+    def stats(self):
+        """Return hit/miss counters and the number of stored entries."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,49 @@
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from logger import setup_logger
+
+logger = setup_logger('retrieval')
+
+def _sub_index(vector_store, members):
+    """Build a standalone FAISS store from (position, docstore id, document) members of a larger store."""
+    index = faiss.IndexFlat(vector_store.index.d, vector_store.index.metric_type)
+    index.add(np.vstack([vector_store.index.reconstruct(position) for position, _, _ in members]))
+    return FAISS(
+        vector_store.embedding_function,
+        index,
+        InMemoryDocstore({doc_id: doc for _, doc_id, doc in members}),
+        {i: doc_id for i, (_, doc_id, _) in enumerate(members)},
+        normalize_L2=vector_store._normalize_L2,
+        distance_strategy=vector_store.distance_strategy,
+    )
+
+def _category_members(vector_store, category=None):
+    """Group (position, docstore id, document) members by ``category`` metadata, optionally for one category.
+
+    Documents without a category (e.g. an index built before metadata was stored) are skipped.
+
+    Only reads the docstore; no vectors are touched.
+    """
+    groups = {}
+    for position, doc_id in sorted(vector_store.index_to_docstore_id.items()):
+        doc = vector_store.docstore.search(doc_id)
+        doc_category = getattr(doc, "metadata", {}).get("category")
+        if doc_category and (category is None or doc_category == category):
+            groups.setdefault(doc_category, []).append((position, doc_id, doc))
+    return groups
+
+def select_category_store(vector_store, category, min_examples=3):
+    """Return the category's sub-index, or the global index if the category has too few examples.
+
+    Only the requested category's vectors are copied into the sub-index.
+    """
+    if category is None:
+        return vector_store
+    members = _category_members(vector_store, category).get(category, [])
+    if len(members) < min_examples:
+        logger.info(f"Only {len(members)} examples for {category}; using the global example index")
+        return vector_store
+    logger.info(f"Using {len(members)}-example sub-index for {category}")
+    return _sub_index(vector_store, members)
@@ -0,0 +1,43 @@
+from extraction.categories import CATEGORIES, category_scores
+from extraction.chunking import score_chunk, split_into_chunks
+from logger import setup_logger
+
+logger = setup_logger('routing')
+
+# A chunk is also routed to categories scoring at least this fraction of its best one,
+# so a combined material (e.g. a ZnO/CdS heterostructure) keeps its minority category
+MIN_SCORE_FRACTION = 0.5
+
+def route_chunks(text, max_chunk_chars=1500):
+    """Assign each synthesis-relevant chunk to the categories whose keywords it matches.
+
+    A chunk goes to every category scoring at least ``MIN_SCORE_FRACTION`` of its best score.
+    Chunks without synthesis signals (introductions, references) are ignored unless no
+    chunk has any, so passing mentions of other materials do not pull in their categories.
+    Returns {category: [chunk, ...]}.
+    """
+    chunks = split_into_chunks(text, max_chunk_chars)
+    relevant = [chunk for chunk in chunks if score_chunk(chunk) > 0] or chunks
+    routes = {}
+    for chunk in relevant:
+        scores = category_scores(f"{chunk['heading']}\n{chunk['text']}")
+        best = max(scores.values(), default=0)
+        if best == 0:
+            continue
+        for category, score in scores.items():
+            if score > 0 and score >= best * MIN_SCORE_FRACTION:
+                routes.setdefault(category, []).append(chunk)
+    return routes
+
+def route_categories(text, max_chunk_chars=1500):
+    """Return the categories a paper likely covers, most-supported first.
+
+    Falls back to every category when no chunk matches any routing keyword.
+    """
+    routes = route_chunks(text, max_chunk_chars)
+    if not routes:
+        logger.info("No category keywords found; extracting for all categories")
+        return list(CATEGORIES)
+    categories = sorted(routes, key=lambda category: (-len(routes[category]), CATEGORIES.index(category)))
+    logger.info(f"Routed chunks to {', '.join(f'{c} ({len(routes[c])})' for c in categories)}")
+    return categories
@@ -0,0 +1,86 @@
+import json
+
+class EntryStreamParser:
+    """Incrementally parse a JSON array of entry objects from text chunks.
+
+    Each object is emitted as soon as its closing brace arrives, so callers see entries
+    while the model is still generating. Code fences and text before the array are
+    skipped; a bare object instead of an array is accepted too. When the stream ends
+    early or turns malformed, ``entries`` keeps everything parsed so far and ``tail``
+    holds the unparsed remainder.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.complete = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0          # start of the unparsed remainder
+        self._started = False
+        self._bare_object = False
+        self._scan_from = 0    # where to look for the next closing brace before retrying
+
+    @property
+    def tail(self):
+        return "" if self.complete else self._buffer[self._pos:]
+
+    def feed(self, chunk):
+        """Add a chunk of model output and return the entries it completed."""
+        self._buffer += chunk
+        new_entries = []
+        while not self.complete:
+            if not self._started and not self._find_start():
+                break
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n,":
+                self._pos += 1
+            if self._pos == len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+            if char == "]":
+                self.complete = True
+                break
+            if char != "{":
+                break  # malformed; wait for close() to report the tail
+            # Only retry decoding once a new closing brace could have finished the object
+            closing = self._buffer.find("}", max(self._scan_from, self._pos))
+            if closing == -1:
+                self._scan_from = len(self._buffer)
+                break
+            try:
+                entry, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                self._scan_from = closing + 1
+                continue
+            self._pos = self._scan_from = end
+            if isinstance(entry, dict):
+                self.entries.append(entry)
+                new_entries.append(entry)
+            if self._bare_object:
+                self.complete = True
+        return new_entries
+
+    def _find_start(self):
+        array_start = self._buffer.find("[", self._pos)
+        object_start = self._buffer.find("{", self._pos)
+        if array_start == -1 and object_start == -1:
+            return False
+        if array_start != -1 and (object_start == -1 or array_start < object_start):
+            self._pos = array_start + 1
+        else:
+            self._pos = object_start
+            self._bare_object = True
+        self._started = True
+        return True
+
+    def close(self):
+        """Mark the end of the stream; returns True if a complete array (or object) was parsed."""
+        return self.complete
+
+def parse_partial(content):
+    """Parse as many complete entries as possible from a (possibly truncated) response.
+
+    Returns (entries, complete).
+    """
+    parser = EntryStreamParser()
+    parser.feed(content)
+    return parser.entries, parser.close()
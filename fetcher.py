@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from logger import setup_logger
+
+logger = setup_logger('pdf_fetcher')
+
+DEFAULT_CACHE_DIR = "cache/pdf_downloads"
+
+class PdfFetcher:
+    """Thread-pooled PDF downloader with a pooled session and an on-disk cache keyed by URL.
+
+    Cached responses are revalidated with If-None-Match / If-Modified-Since, so unchanged
+    PDFs cost a 304 instead of a full download.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_workers=8, timeout=10):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        os.makedirs(cache_dir, exist_ok=True)
+        # One session whose connection pool is sized for the worker count
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pdf"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_atomic(self, path, data, mode="wb"):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url):
+        """Return {"url", "content", "error", "cached"} for a URL; content is None if not a PDF."""
+        pdf_path, meta_path = self._paths(url)
+        meta = None
+        headers = {}
+        if os.path.exists(pdf_path) and os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and meta is not None:
+                with open(pdf_path, "rb") as f:
+                    return {"url": url, "content": f.read(), "error": None, "cached": True}
+            if response.status_code != 200 or "application/pdf" not in response.headers.get("Content-Type", ""):
+                return {"url": url, "content": None, "error": "PDF not available", "cached": False}
+            self._write_atomic(pdf_path, response.content)
+            new_meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            self._write_atomic(meta_path, json.dumps(new_meta), mode="w")
+            return {"url": url, "content": response.content, "error": None, "cached": False}
+        except Exception as e:
+            # Serve a stale copy rather than nothing when the server is unreachable
+            if meta is not None:
+                logger.warning(f"Revalidation failed for {url}; using cached copy: {str(e)}")
+                with open(pdf_path, "rb") as f:
+                    return {"url": url, "content": f.read(), "error": None, "cached": True}
+            logger.error(f"Error fetching {url}: {str(e)}")
+            return {"url": url, "content": None, "error": str(e), "cached": False}
+
+    def iter_fetch(self, urls):
+        """Fetch URLs concurrently, yielding (index, result) in completion order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.fetch, url): i for i, url in enumerate(urls)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
@@ -1,18 +1,23 @@
-from extraction.llm_extractor import LLMExtractor
-from pdf_utils import extract_text_from_pdf
+# Heavy modules (LangChain, pypdf) are imported where they are used, so --help, argument
+# errors and re-exports return without loading them
+from extraction.categories import ALL_CATEGORIES, CATEGORY_CHOICES
+from writers import CsvWriter, JsonArrayWriter, TeeWriter, open_writer, read_entries
 from logger import setup_logger
-import os
+import argparse
 import json
-import csv
+import logging
+import os
 
 logger = setup_logger('nanomaterial_extraction')
 
+DEFAULT_PDF_PATH = "data/my_paper.pdf"
+OUTPUT_FORMATS = ["json", "csv", "jsonl", "parquet"]
+
 def save_to_json(data, output_path):
     """Save extracted data to a JSON file."""
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with JsonArrayWriter(output_path) as writer:
+            writer.write_entries(data)
         logger.info(f"Saved extracted parameters to {output_path}")
     except Exception as e:
         logger.error(f"Error saving JSON: {str(e)}")
@@ -21,37 +26,145 @@ def save_to_json(data, output_path):
 def save_to_csv(data, output_path):
     """Save extracted data to a CSV file."""
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         if not data:
             logger.warning("No data to save to CSV")
             return
-        keys = data[0].keys()
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(data)
+        # Fixed schema so error rows and provenance columns fit; unknown keys go to "extra"
+        with CsvWriter(output_path) as writer:
+            writer.write_entries(data)
         logger.info(f"Saved extracted parameters to {output_path}")
     except Exception as e:
         logger.error(f"Error saving CSV: {str(e)}")
         raise
 
+def parse_args(argv=None):
+    """Parse command-line arguments; with no inputs or category, main() falls back to interactive prompts."""
+    parser = argparse.ArgumentParser(description="Extract nanomaterial synthesis parameters from PDFs.")
+    parser.add_argument("inputs", nargs="*", metavar="PATH",
+                        help="PDF files, directories or glob patterns to process non-interactively")
+    parser.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="Same as the positional PATH arguments (kept for existing scripts)")
+    parser.add_argument("--category", choices=CATEGORY_CHOICES,
+                        help=f"Nanomaterial category, or \"{ALL_CATEGORIES}\" to extract every category in one pass "
+                             f"(required with input paths; alone, processes {DEFAULT_PDF_PATH})")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="Output format")
+    parser.add_argument("--output", help="Output path (default: output/extracted_parameters.<format>)")
+    parser.add_argument("--store", metavar="DB",
+                        help="Also add entries to this SQLite results store (see results_store.py)")
+    parser.add_argument("--reexport", metavar="RESULTS",
+                        help="Convert an existing JSON/JSONL results file to --format without extracting anything")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Number of processes used for PDF parsing (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Maximum number of concurrent LLM calls")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Send only the most synthesis-relevant chunks within this many tokens to the LLM")
+    parser.add_argument("--max-prompt-tokens", type=int, default=None,
+                        help="Split longer papers into windows extracted in parallel and merged")
+    parser.add_argument("--append", action="store_true",
+                        help="Append to an existing JSONL/CSV output instead of overwriting it")
+    parser.add_argument("--metrics-file", help="Append per-stage timing spans to this JSON-lines file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port at /metrics")
+    parser.add_argument("--log-payloads", action="store_true",
+                        help="Log full prompts and LLM responses (DEBUG); see LOG_PAYLOAD_SAMPLE_RATE for sampling")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the extracted PDF text and LLM response caches")
+    parser.add_argument("--embedding-backend",
+                        help="Retrieval embeddings: gemini or hashed-tfidf (local, offline); overrides "
+                             "EMBEDDING_BACKEND and must match the backend that built the index")
+    args = parser.parse_args(argv)
+    args.inputs = args.inputs + (args.batch or [])
+    if args.reexport:
+        if args.inputs or args.category:
+            parser.error("--reexport cannot be combined with input paths or --category")
+        if not args.reexport.endswith((".json", ".jsonl")):
+            parser.error("--reexport expects a .json or .jsonl results file")
+        if not os.path.isfile(args.reexport):
+            parser.error(f"--reexport file not found: {args.reexport}")
+    elif args.inputs and not args.category:
+        parser.error("--category is required with input paths")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.append and args.format not in ("jsonl", "csv"):
+        parser.error("--append is only supported for jsonl and csv output")
+    args.output = args.output or f"output/extracted_parameters.{args.format}"
+    if args.reexport and os.path.abspath(args.output) == os.path.abspath(args.reexport):
+        parser.error("--output must differ from the --reexport file")
+    return args
+
+def run_reexport(args):
+    """Write a previous run's results in another format; needs neither the LLM nor the PDFs."""
+    entries = read_entries(args.reexport)
+    with open_writer(args.output, args.format, append=args.append) as writer:
+        writer.write_entries(entries)
+    logger.info(f"Re-exported {len(entries)} entries from {args.reexport} to {args.output}")
+
+def configure_observability(args):
+    """Set up metrics export and payload logging from command-line flags."""
+    from metrics import metrics
+
+    if args.metrics_file:
+        metrics.configure(path=args.metrics_file)
+    if args.metrics_port:
+        metrics.serve(port=args.metrics_port)
+        logger.info(f"Serving Prometheus metrics on port {args.metrics_port}")
+    if args.log_payloads:
+        logging.getLogger('llm_extractor').setLevel(logging.DEBUG)
+
+def run_batch_mode(args):
+    """Process a corpus of PDFs, streaming each paper's results into a single output file."""
+    from batch import collect_pdf_paths, run_batch
+    from extraction.llm_extractor import LLMExtractor
+    from extraction.response_cache import ResponseCache
+    from pdf_cache import PdfTextCache
+
+    pdf_paths = collect_pdf_paths(args.inputs)
+    if not pdf_paths:
+        raise ValueError("No PDF files found for the given inputs")
+    logger.info(f"Batch processing {len(pdf_paths)} PDFs for {args.category}")
+
+    response_cache = None if args.no_cache else ResponseCache()
+    extractor = LLMExtractor(category=args.category, response_cache=response_cache,
+                             token_budget=args.token_budget, max_prompt_tokens=args.max_prompt_tokens,
+                             embedding_backend=args.embedding_backend)
+    pdf_cache = None if args.no_cache else PdfTextCache()
+    writer = open_writer(args.output, args.format, append=args.append)
+    if args.store:
+        from results_store import ResultStore
+
+        writer = TeeWriter(writer, ResultStore(args.store))
+    with writer:
+        written = run_batch(pdf_paths, extractor, parse_workers=args.parse_workers,
+                            llm_concurrency=args.concurrency, pdf_cache=pdf_cache, writer=writer)
+    logger.info(f"Wrote {written} entries from {len(pdf_paths)} PDFs to {args.output}")
+    if response_cache is not None:
+        logger.info(f"LLM response cache: {response_cache.stats()}")
+
 def main():
     try:
-        # Define available categories
-        categories = [
-            "Metal Oxides",
-            "Metal Sulfides",
-            "Metal-Organic Frameworks",
-            "Carbon-based",
-            "Polymeric Nanomaterials",
-            "Pure Metals / Alloys"
-        ]
+        args = parse_args()
+        if args.reexport:
+            run_reexport(args)
+            return
+        configure_observability(args)
+        if args.category:
+            # Non-interactive: explicit inputs, or the default paper when only a category is given
+            args.inputs = args.inputs or [DEFAULT_PDF_PATH]
+            run_batch_mode(args)
+            return
+
+        from extraction.llm_extractor import LLMExtractor
+        from extraction.response_cache import ResponseCache
+        from pdf_cache import PdfTextCache
+        from pdf_utils import extract_text_from_pdf
+
+        categories = CATEGORY_CHOICES
         
         # Prompt user to select a category
         print("Available categories:")
         for i, category in enumerate(categories, 1):
             print(f"{i}. {category}")
-        category_choice = int(input("Enter the number of the category (1-6): "))
+        category_choice = int(input(f"Enter the number of the category (1-{len(categories)}): "))
         if category_choice < 1 or category_choice > len(categories):
             raise ValueError("Invalid category choice")
         selected_category = categories[category_choice - 1]
@@ -68,14 +181,18 @@ def main():
         logger.info(f"Selected output format: {output_format}")
         
         # Extract text from PDF
-        pdf_path = "data/my_paper.pdf"
+        pdf_path = DEFAULT_PDF_PATH
         logger.info(f"Extracting text from {pdf_path}")
-        pdf_text = extract_text_from_pdf(pdf_path)
+        pdf_cache = None if args.no_cache else PdfTextCache()
+        pdf_text = extract_text_from_pdf(pdf_path, cache=pdf_cache)
         logger.info("PDF text extraction completed")
         
         # Initialize LLM extractor
         logger.info(f"Initializing LLM extractor for {selected_category}")
-        extractor = LLMExtractor(category=selected_category)
+        response_cache = None if args.no_cache else ResponseCache()
+        extractor = LLMExtractor(category=selected_category, response_cache=response_cache,
+                                 token_budget=args.token_budget, max_prompt_tokens=args.max_prompt_tokens,
+                                 embedding_backend=args.embedding_backend)
         
         # Extract parameters
         logger.info("Starting parameter extraction")
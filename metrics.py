@@ -0,0 +1,123 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+
+METRICS_PATH_ENV = "METRICS_PATH"
+PAYLOAD_SAMPLE_ENV = "LOG_PAYLOAD_SAMPLE_RATE"
+
+class Metrics:
+    """Per-stage timing spans and counters, exported as JSON lines and/or Prometheus text.
+
+    Each finished span is appended as one JSON object to ``path`` (if set) and folded into
+    in-memory aggregates that ``to_prometheus()`` renders.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._durations = {}  # stage -> [count, total seconds, errors]
+        self._counters = {}   # (name, stage) -> value
+
+    def configure(self, path=None):
+        """Set the JSON-lines sink; worker processes inherit it through the environment."""
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            os.environ[METRICS_PATH_ENV] = path
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        """Time a pipeline stage; the yielded dict can be filled with attributes such as token counts."""
+        record = {"stage": stage, **attributes}
+        start = time.perf_counter()
+        try:
+            yield record
+            record["status"] = "ok"
+        except Exception:
+            record["status"] = "error"
+            raise
+        finally:
+            # A generator closed mid-span (e.g. an abandoned stream) exits with neither
+            record.setdefault("status", "cancelled")
+            record["duration_s"] = time.perf_counter() - start
+            self._record(record)
+
+    def incr(self, name, value=1, stage=""):
+        with self._lock:
+            self._counters[(name, stage)] = self._counters.get((name, stage), 0) + value
+
+    def _record(self, record):
+        record["ts"] = time.time()
+        with self._lock:
+            totals = self._durations.setdefault(record["stage"], [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += record["duration_s"]
+            totals[2] += record["status"] == "error"
+            for key, value in record.items():
+                # Numeric attributes (token counts, entries, pages) accumulate as counters
+                if key not in ("duration_s", "ts") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._counters[(key, record["stage"])] = self._counters.get((key, record["stage"]), 0) + value
+                elif value is True:
+                    self._counters[(key, record["stage"])] = self._counters.get((key, record["stage"]), 0) + 1
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def to_prometheus(self):
+        """Render aggregates in the Prometheus text exposition format."""
+        lines = ["# TYPE extraction_stage_seconds summary"]
+        with self._lock:
+            for stage, (count, total, errors) in sorted(self._durations.items()):
+                lines.append(f'extraction_stage_seconds_count{{stage="{stage}"}} {count}')
+                lines.append(f'extraction_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'extraction_stage_errors_total{{stage="{stage}"}} {errors}')
+            declared = set()
+            for (name, stage), value in sorted(self._counters.items()):
+                if name not in declared:
+                    lines.append(f"# TYPE extraction_{name}_total counter")
+                    declared.add(name)
+                lines.append(f'extraction_{name}_total{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Serve ``/metrics`` in Prometheus text format from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+metrics = Metrics(os.getenv(METRICS_PATH_ENV))
+
+def log_payload(logger, label, payload):
+    """Log a full prompt/response at DEBUG, or at INFO for a sampled fraction of calls.
+
+    The sample rate comes from LOG_PAYLOAD_SAMPLE_RATE (default 0), so large payloads are
+    neither formatted nor written in the hot path unless asked for.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{label}: {payload}")
+        return
+    rate = float(os.getenv(PAYLOAD_SAMPLE_ENV, "0") or 0)
+    if rate > 0 and random.random() < rate:
+        logger.info(f"{label} (sampled): {payload}")
@@ -0,0 +1,264 @@
+import argparse
+import re
+
+# Number or range such as "100", "1,000", "100-120", "4 to 16", "between 100 and 200", "7.5–8.5";
+# a trailing "± x" tolerance is consumed and ignored
+_DIGITS = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+# Not directly after "letter-" or "^", so the exponent in "min-1", "h-1" or "min^-1" never starts a number
+_NUMBER = r"(?<![\w.,^])(?<![^\W\d_][-⁻])(?<!\^-)(-?" + _DIGITS + ")"
+_TOLERANCE = r"(?:\s*(?:±|\+/-)\s*" + _DIGITS + ")?"
+_RANGE_TAIL = _TOLERANCE + r"(?:\s*(?:-|–|—|~|\bto\b|\band\b)\s*(" + _DIGITS + ")" + _TOLERANCE + ")?"
+_RANGE = _NUMBER + _RANGE_TAIL
+
+# A heating/cooling rate ("2 °C/min", "5 K min-1", "10 °C min⁻¹") is not a temperature; the
+# lookahead also covers the digits and range tail so backtracking cannot leave a shorter bare
+# number behind
+_RATE = (r"(?![\d.,]*(?:\s*(?:-|–|—|~|\bto\b)\s*[\d.,]+)?\s*(?:°\s*[CF]|℃|[KCF])?"
+         r"\s*(?:/\s*(?:min|h|s)\b|[·⋅]?\s*(?:min|h|s)\s*\^?\s*[-⁻]\s*[1¹]))")
+TEMPERATURE_RE = re.compile(_RANGE + _RATE + r"\s*(°\s*[CF]|℃|K\b|[CF]\b)?", re.IGNORECASE)
+# A number followed by a word that is not a known unit ("24 cycles") is not a duration; a
+# following hours/minutes/seconds part ("2 hours 30 min", "1 day 12 h") is captured to be added to it
+DURATION_RE = re.compile(
+    _RANGE + r"\s*(?:(s|sec|secs|seconds?|m|min|mins|minutes?|h|hr|hrs|hours?|d|days?|w|wk|weeks?"
+    r"|mo|mos|months?|y|yr|yrs|years?)(?![^\W\d_])"
+    r"(?:\s*(" + _DIGITS + r")\s*(s|sec|secs|seconds?|m|min|mins|minutes?|h|hr|hrs|hours?)(?![^\W\d_]))?"
+    r"|(?![\d.]|\s*[^\W\d_]))",
+    re.IGNORECASE,
+)
+
+ROOM_TEMPERATURE_RE = r"\broom[\s-]temperature\b|\bRT\b|\bambient\b"
+ROOM_TEMPERATURE_C = 25.0
+OVERNIGHT_H = 12.0
+
+# Hours per duration unit, keyed by the unit's first letter ("mo" for months)
+_HOURS_PER_UNIT = {"s": 1 / 3600, "m": 1 / 60, "h": 1.0, "d": 24.0, "w": 168.0, "mo": 730.5, "y": 8766.0}
+
+# Escaped or double-encoded sequences the model emits, in the order they are repaired
+MOJIBAKE = {
+    "\\u00b0": "°", "\\u22c5": "⋅", "Â°": "°", "Âº": "°", "º": "°", "â€“": "–", "â€”": "—",
+    "âˆ’": "-", "−": "-", "Ã—": "×", "â‹…": "⋅", "Â·": "·", "Â": "",
+}
+
+# Numeric columns of the normalized table
+RANGE_COLUMNS = ["temp_min_c", "temp_max_c", "time_min_h", "time_max_h", "ph_min", "ph_max"]
+
+def repair_text(value):
+    """Undo the most common escape/mojibake artefacts around degree signs and dashes."""
+    for bad, good in MOJIBAKE.items():
+        value = value.replace(bad, good)
+    return value
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+def _unit_key(unit):
+    unit = unit.lower()
+    return "mo" if unit.startswith("mo") else unit[:1]
+
+def _with_units(matches):
+    """Drop bare numbers (amounts, ratios) when some matches carry an explicit unit."""
+    with_unit = [match for match in matches if match[2]]
+    return with_unit or matches
+
+def _to_celsius(value, unit):
+    unit = (unit or "c").replace("°", "").replace(" ", "").lower()
+    if unit == "k":
+        return value - 273.15
+    if unit == "f":
+        return (value - 32) * 5 / 9
+    return value
+
+def parse_temperature(value):
+    """Return (min °C, max °C) for a free-text temperature, or (None, None).
+
+    Ranges and multi-step temperatures span their lowest to highest value; Kelvin and
+    Fahrenheit are converted and, when no value has a unit, numbers are taken as °C.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    text = repair_text(str(value))
+    temperatures = []
+    for low, high, unit in _with_units(TEMPERATURE_RE.findall(text)):
+        temperatures.append(_to_celsius(_number(low), unit))
+        if high:
+            temperatures.append(_to_celsius(_number(high), unit))
+    if re.search(ROOM_TEMPERATURE_RE, text, re.IGNORECASE):
+        temperatures.append(ROOM_TEMPERATURE_C)
+    if not temperatures:
+        return None, None
+    return min(temperatures), max(temperatures)
+
+def parse_duration(value):
+    """Return (min hours, max hours) for a free-text reaction time, or (None, None).
+
+    When no value has a unit, numbers are taken as hours; "overnight" counts as 12 h.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    text = repair_text(str(value))
+    hours = []
+    for low, high, unit, extra, extra_unit in _with_units(DURATION_RE.findall(text)):
+        factor = _HOURS_PER_UNIT[_unit_key(unit)] if unit else 1.0
+        added = _number(extra) * _HOURS_PER_UNIT[_unit_key(extra_unit)] if extra else 0.0
+        hours.append(_number(low) * factor + added)
+        if high:
+            hours.append(_number(high) * factor + added)
+    if re.search(r"\bovernight\b", text, re.IGNORECASE):
+        hours.append(OVERNIGHT_H)
+    if not hours:
+        return None, None
+    return min(hours), max(hours)
+
+# A "pH" token before the value fills the unit column, so in "0.1 M, pH 3" the bare
+# concentration is ignored; group order is (token, low, high)
+PH_RE = re.compile(
+    r"(?:(\bpH(?![a-z])\s*(?:value\s*)?(?:of|=|:|≈|~|around|about)?\s*)|(?<![\w.,]))(-?" + _DIGITS + ")"
+    + _RANGE_TAIL,
+    re.IGNORECASE,
+)
+
+def repair_series(series):
+    """Vectorized repair_text over a pandas Series of strings (missing values stay missing)."""
+    series = series.astype("string")
+    for bad, good in MOJIBAKE.items():
+        series = series.str.replace(bad, good, regex=False)
+    return series
+
+def _range_bounds(series, regex, convert, groups=(0, 1, 2), extra=None):
+    """Per-row (min, max) over every number or range matched in a string Series.
+
+    ``groups`` are the positions of the (low, high, unit) groups in ``regex``; ``convert(values, units)`` maps matched
+    numbers to the target unit. ``extra`` gives the (amount, unit) groups of a smaller part
+    added to both bounds ("2 h 30 min"). When some matches in a row carry a unit, bare
+    numbers in that row are ignored (as in the scalar parsers).
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Plain object dtype keeps the matched numbers float64 rather than nullable integers
+    matches = series.astype(object).str.extractall(regex.pattern, flags=regex.flags)
+    if matches.empty:
+        empty = pd.Series(np.nan, index=series.index)
+        return empty, empty.copy()
+    low_group, high_group, unit_group = groups
+    low = pd.to_numeric(matches[low_group].str.replace(",", "", regex=False))
+    high = pd.to_numeric(matches[high_group].str.replace(",", "", regex=False)).fillna(low)
+    units = matches[unit_group].fillna("").str.lower().str.replace("°", "", regex=False).str.strip()
+    with_unit = units != ""
+    keep = with_unit | ~with_unit.groupby(level=0).transform("any")
+    low, high, units = low[keep], high[keep], units[keep]
+    low, high = convert(low, units), convert(high, units)
+    if extra is not None:
+        amount_group, extra_unit_group = extra
+        amounts = pd.to_numeric(matches[amount_group][keep].str.replace(",", "", regex=False)).fillna(0.0)
+        added = convert(amounts, matches[extra_unit_group][keep].fillna("").str.lower())
+        low, high = low + added, high + added
+    # A conversion that rejects either bound rejects the whole range
+    valid = low.notna() & high.notna()
+    low, high = low[valid], high[valid]
+    minimum = pd.concat([low, high]).groupby(level=0).min().reindex(series.index)
+    maximum = pd.concat([low, high]).groupby(level=0).max().reindex(series.index)
+    return minimum, maximum
+
+def _celsius(values, units):
+    return values.where(units != "k", values - 273.15).where(units != "f", (values - 32) * 5 / 9)
+
+def _hours(values, units):
+    keys = units.str[:1].where(~units.str.startswith("mo"), "mo")
+    return values * keys.map(_HOURS_PER_UNIT).fillna(1.0)
+
+def _ph(values, units):
+    # Anything outside the pH scale is an amount or a concentration, not a pH; _range_bounds
+    # drops the whole match when either bound is masked, so "13-15" is not read as pH 13
+    return values.where((values >= 0) & (values <= 14))
+
+def _factorize(frame, name):
+    """Return (codes, repaired distinct values) for a column; code -1 marks a missing value.
+
+    Parsing and repair then run once per distinct string instead of once per row.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if name not in frame:
+        return np.full(len(frame), -1), pd.Series([], dtype="string")
+    column = frame[name]
+    column = column.where(column.isna(), column.astype(str))
+    codes, uniques = pd.factorize(column)
+    return codes, repair_series(pd.Series(uniques, dtype=object))
+
+def _expand(values, codes, missing):
+    """Map per-distinct-value results back onto rows (code -1 gets ``missing``)."""
+    import numpy as np
+
+    values = np.asarray(values, dtype=object if missing is None else float)
+    return np.append(values, missing)[codes]
+
+def normalize_entries(entries, include_text=False):
+    """Normalize extracted entries into a compact, typed pandas DataFrame.
+
+    Temperatures become ``temp_min_c``/``temp_max_c`` (°C; K and °F converted, room
+    temperature = 25), reaction times ``time_min_h``/``time_max_h`` (s/min/h/days/weeks/months/years),
+    and pH ``ph_min``/``ph_max``, all float32 (NaN where nothing parsed). Low-cardinality
+    text columns become categoricals. Raw text columns are kept if ``include_text``.
+    Parsing uses vectorized pandas string operations over each column's distinct values.
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = entries if isinstance(entries, pd.DataFrame) else pd.DataFrame.from_records(entries)
+    if "error" in frame:
+        frame = frame[frame["error"].isna()]
+    frame = frame.reset_index(drop=True)
+    table = pd.DataFrame(index=frame.index)
+
+    for name in ("category", "method", "precursor", "solvent", "source_file"):
+        codes, uniques = _factorize(frame, name)
+        uniques = uniques.str.strip()
+        if name in ("method", "solvent"):
+            uniques = uniques.str.lower()
+        table[name] = pd.Categorical(_expand(uniques.astype(object).where(uniques.notna(), None), codes, None))
+
+    codes, temperatures = _factorize(frame, "temperature")
+    low, high = _range_bounds(temperatures, TEMPERATURE_RE, _celsius)
+    room = temperatures.str.contains(ROOM_TEMPERATURE_RE, case=False, regex=True).fillna(False).to_numpy(bool)
+    table["temp_min_c"] = _expand(np.where(room, np.fmin(low, ROOM_TEMPERATURE_C), low), codes, np.nan)
+    table["temp_max_c"] = _expand(np.where(room, np.fmax(high, ROOM_TEMPERATURE_C), high), codes, np.nan)
+
+    codes, durations = _factorize(frame, "reaction_time")
+    low, high = _range_bounds(durations, DURATION_RE, _hours, extra=(3, 4))
+    overnight = durations.str.contains(r"\bovernight\b", case=False, regex=True).fillna(False).to_numpy(bool)
+    table["time_min_h"] = _expand(np.where(overnight, np.fmin(low, OVERNIGHT_H), low), codes, np.nan)
+    table["time_max_h"] = _expand(np.where(overnight, np.fmax(high, OVERNIGHT_H), high), codes, np.nan)
+
+    codes, phs = _factorize(frame, "pH")
+    low, high = _range_bounds(phs, PH_RE, _ph, groups=(1, 2, 0))
+    table["ph_min"], table["ph_max"] = _expand(low, codes, np.nan), _expand(high, codes, np.nan)
+    table[RANGE_COLUMNS] = table[RANGE_COLUMNS].astype("float32")
+
+    if include_text:
+        for name in ("temperature", "reaction_time", "pH", "text_snippet"):
+            codes, uniques = _factorize(frame, name)
+            table[name] = pd.Series(_expand(uniques.astype(object).where(uniques.notna(), None), codes, None),
+                                    dtype="string")
+    return table
+
+if __name__ == "__main__":
+    from writers import read_entries
+
+    parser = argparse.ArgumentParser(description="Normalize extracted entries into a typed numeric table.")
+    parser.add_argument("input", help="JSON or JSONL results file")
+    parser.add_argument("--output", required=True, help="Output .parquet or .csv path")
+    parser.add_argument("--include-text", action="store_true", help="Keep the raw text columns")
+    args = parser.parse_args()
+
+    table = normalize_entries(read_entries(args.input), include_text=args.include_text)
+    if args.output.endswith(".parquet"):
+        table.to_parquet(args.output, index=False)
+    else:
+        table.to_csv(args.output, index=False)
+    print(table.describe().to_string())
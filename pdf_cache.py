@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import tempfile
+from logger import setup_logger
+
+logger = setup_logger('pdf_cache')
+
+DEFAULT_CACHE_DIR = "cache/pdf_text"
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+# Eviction frees space down to this fraction of max_bytes so the next puts do not rescan
+EVICT_TO_FRACTION = 0.9
+# Puts between full rescans, which pick up entries written by other processes
+RESCAN_EVERY = 256
+
+class PdfTextCache:
+    """Content-addressed on-disk cache of per-page PDF text.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the pypdf version, written
+    atomically (temp file + rename) so concurrent workers can share one directory, and
+    evicted least-recently-used first once the directory exceeds ``max_bytes``. The
+    directory size is tracked incrementally, so the directory is only scanned when that
+    estimate crosses the limit or every ``RESCAN_EVERY`` puts.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._estimated_bytes = None  # unknown until the first scan
+        self._puts_since_scan = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_bytes):
+        """Return the cache key for the given PDF bytes."""
+        from pypdf import __version__ as pypdf_version
+
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        return f"{digest}-pypdf{pypdf_version}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached page texts for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pages = json.load(f)["pages"]
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Discarding corrupt cache entry {path}: {str(e)}")
+            self._remove(path)
+            return None
+        # Bump the mtime so eviction treats the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pages
+
+    def put(self, key, pages):
+        """Atomically store the page texts for a key and evict old entries if needed."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pages": list(pages)}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self._puts_since_scan += 1
+        if self._estimated_bytes is not None:
+            self._estimated_bytes += size
+        if (self._estimated_bytes is None or self._estimated_bytes > self.max_bytes
+                or self._puts_since_scan >= RESCAN_EVERY):
+            self.evict()
+
+    def get_or_extract(self, pdf_bytes, extract_pages):
+        """Return cached page texts for the PDF bytes, calling ``extract_pages()`` on a miss."""
+        key = self.key_for(pdf_bytes)
+        pages = self.get(key)
+        if pages is not None:
+            logger.info(f"PDF text cache hit for {key[:12]}")
+            return pages
+        pages = list(extract_pages())
+        self.put(key, pages)
+        return pages
+
+    def evict(self):
+        """Scan the cache; if it exceeds ``max_bytes``, delete least-recently-used entries
+        until it is below ``EVICT_TO_FRACTION`` of the limit."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        self._puts_since_scan = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                self._remove(path)
+                total -= size
+                if total <= self.max_bytes * EVICT_TO_FRACTION:
+                    break
+            logger.info(f"Evicted PDF text cache entries down to {total} bytes")
+        self._estimated_bytes = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,23 +1,134 @@
 from pypdf import PdfReader
+from concurrent.futures import ProcessPoolExecutor
+import io
 import logging
+import os
+from metrics import metrics
 from logger import setup_logger
 
 logger = setup_logger('pdf_utils')
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file."""
+# Documents with at least this many pages are split across processes in parallel mode
+PARALLEL_PAGE_THRESHOLD = 50
+
+# The PdfTextCache of a parse worker process, set once by init_parse_worker
+_worker_cache = None
+
+# Every function taking ``source`` accepts a file path, PDF bytes (bytes, bytearray or a
+# memoryview over an upload buffer) or a seekable binary file object such as BytesIO.
+
+def _open_reader(source):
+    """Return a PdfReader over a path, bytes-like object or binary file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return PdfReader(source)
+
+def read_pdf_bytes(source):
+    """Return the raw bytes of a PDF source (zero-copy for bytes and BytesIO buffers)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    source.seek(0)
+    return source.read()
+
+def describe_source(source):
+    """Short label for log messages: the path, or the file object's name if it has one."""
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    return getattr(source, "name", None) or "in-memory PDF"
+
+def _extract_page_range(source, start, stop):
+    """Extract the text of pages [start, stop) from a PDF; runs inside worker processes."""
+    reader = _open_reader(source)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def count_pages(source):
+    """Return the number of pages in a PDF."""
+    return len(_open_reader(source).pages)
+
+def iter_pdf_pages(source, start=0, stop=None):
+    """Yield (page_number, text) for each page as it is decoded."""
+    reader = _open_reader(source)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for page_number in range(start, stop):
+        yield page_number, reader.pages[page_number].extract_text() or ""
+
+def iter_pdf_page_ranges(source, pages_per_range=20, workers=None):
+    """Yield (start, page_texts) for consecutive page ranges, decoded across a process pool.
+
+    Ranges are yielded in document order as soon as each one (and all before it) is ready,
+    so consumers can start on the first pages while later ranges are still decoding.
+    """
+    if not isinstance(source, (str, os.PathLike, bytes)):
+        # Worker processes need a picklable source
+        source = bytes(read_pdf_bytes(source))
+    total = count_pages(source)
+    starts = range(0, total, pages_per_range)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (start, pool.submit(_extract_page_range, source, start, min(start + pages_per_range, total)))
+            for start in starts
+        ]
+        for start, future in futures:
+            yield start, future.result()
+
+def iter_pdf_text(source, parallel=False, pages_per_range=20, workers=None):
+    """Yield page texts in order, optionally decoding large documents across processes."""
+    if parallel and count_pages(source) >= PARALLEL_PAGE_THRESHOLD:
+        for _, page_texts in iter_pdf_page_ranges(source, pages_per_range, workers):
+            yield from page_texts
+    else:
+        for _, page_text in iter_pdf_pages(source):
+            yield page_text
+
+def join_pages(page_texts):
+    """Join page texts into a single document string, skipping empty pages."""
+    return "".join(page_text + "\n" for page_text in page_texts if page_text)
+
+def extract_text_from_pdf(source, parallel=False, workers=None, cache=None):
+    """Extract text from a PDF path, bytes or file object, reusing cached page text when a PdfTextCache is given."""
+    name = describe_source(source)
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
+        with metrics.span("pdf_parse") as span:
+            if cache is not None:
+                pdf_bytes = read_pdf_bytes(source)
+
+                def decode():
+                    span["cache_hit"] = False
+                    # Parse the bytes already in memory rather than reading the file again
+                    return iter_pdf_text(pdf_bytes, parallel=parallel, workers=workers)
+
+                span["cache_hit"] = True
+                pages = cache.get_or_extract(pdf_bytes, decode)
+                text = join_pages(pages)
+            else:
+                pages = list(iter_pdf_text(source, parallel=parallel, workers=workers))
+                text = join_pages(pages)
+            span["pages"] = len(pages)
         if not text.strip():
-            logger.warning(f"No text extracted from {pdf_path}")
+            logger.warning(f"No text extracted from {name}")
         else:
-            logger.info(f"Successfully extracted text from {pdf_path}")
+            logger.info(f"Successfully extracted text from {name}")
         return text
     except Exception as e:
-        logger.error(f"Error extracting text from {pdf_path}: {str(e)}")
-        raise
\ No newline at end of file
+        logger.error(f"Error extracting text from {name}: {str(e)}")
+        raise
+
+def init_parse_worker(cache=None):
+    """Process pool initializer: keep one PdfTextCache per worker for every file it parses.
+
+    Passing the cache with each task would give every task a fresh copy whose size estimate
+    is unknown, so each cache miss would rescan the whole cache directory.
+    """
+    global _worker_cache
+    _worker_cache = cache
+
+def parse_in_worker(source):
+    """Extract text in a parse worker, using the cache set up by init_parse_worker."""
+    return extract_text_from_pdf(source, cache=_worker_cache)
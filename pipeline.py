@@ -0,0 +1,316 @@
+import argparse
+import csv
+import hashlib
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from extraction.categories import CATEGORIES
+from fetcher import PdfFetcher
+from pdf_cache import PdfTextCache
+from pdf_utils import extract_text_from_pdf, init_parse_worker, parse_in_worker
+from search import search_papers
+from writers import TeeWriter, open_writer, read_entries
+from logger import setup_logger
+
+logger = setup_logger('harvest_pipeline')
+
+DB_PATH = "cache/harvest.sqlite"
+DOWNLOAD_DIR = "data/harvest"
+
+# Document states in pipeline order; "failed" records the stage that failed in failed_stage.
+# "writing" marks entries being written, so a run killed before "extracted" is recorded
+# can tell from the output whether they landed.
+STATES = ("searched", "downloaded", "parsed", "writing", "extracted")
+FAILED = "failed"
+# Finished documents are never redone, so the output must keep earlier runs' entries
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+_DOCUMENTS_TABLE = """CREATE TABLE IF NOT EXISTS documents (
+    url TEXT NOT NULL,
+    title TEXT,
+    category TEXT NOT NULL,
+    state TEXT NOT NULL,
+    failed_stage TEXT,
+    pdf_path TEXT,
+    entries INTEGER,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (url, category)
+)"""
+
+class JobStore:
+    """SQLite store of per-document pipeline state, so a killed run resumes where it stopped.
+
+    Documents are keyed by (url, category): a paper found by several category searches is
+    extracted once per category.
+    """
+
+    def __init__(self, path=DB_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate_url_key()
+        self._conn.execute(_DOCUMENTS_TABLE)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_state ON documents (category, state)")
+        self._conn.commit()
+
+    def _migrate_url_key(self):
+        """Re-key a job store created when documents were keyed by url alone."""
+        primary_key = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)") if row[5]]
+        if primary_key != ["url"]:
+            return
+        logger.info("Migrating job store to per-category document keys")
+        self._conn.execute("DROP INDEX IF EXISTS idx_documents_state")
+        self._conn.execute("ALTER TABLE documents RENAME TO documents_by_url")
+        self._conn.execute(_DOCUMENTS_TABLE)
+        self._conn.execute("INSERT INTO documents SELECT url, title, category, state, failed_stage, pdf_path, "
+                           "entries, error, updated_at FROM documents_by_url")
+        self._conn.execute("DROP TABLE documents_by_url")
+        self._conn.commit()
+
+    def add_searched(self, category, results):
+        """Record search results; documents already known keep their current state."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO documents (url, title, category, state, updated_at) VALUES (?, ?, ?, 'searched', ?)",
+                [(r["url"], r["title"], category, now) for r in results if r.get("url")],
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _check_state(state):
+        # A misspelt state would strand documents where no resume query looks for them
+        if state not in STATES and state != FAILED:
+            raise ValueError(f"Unknown document state {state!r}; expected one of {', '.join(STATES + (FAILED,))}")
+
+    def update(self, url, category, state, **fields):
+        self._check_state(state)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        assignments = f"state = ?, updated_at = ?{', ' + columns if columns else ''}"
+        with self._lock:
+            self._conn.execute(f"UPDATE documents SET {assignments} WHERE url = ? AND category = ?",
+                               (state, time.time(), *fields.values(), url, category))
+            self._conn.commit()
+
+    def fail(self, url, category, stage, error):
+        self.update(url, category, FAILED, failed_stage=stage, error=str(error)[:1000])
+
+    def pending(self, category, state):
+        """Return documents of a category currently in the given state."""
+        self._check_state(state)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, title, pdf_path FROM documents WHERE category = ? AND state = ?", (category, state)
+            ).fetchall()
+        return [{"url": url, "title": title, "pdf_path": pdf_path} for url, title, pdf_path in rows]
+
+    def retry_failed(self, category):
+        """Move failed documents back to the state before the stage that failed."""
+        previous = {"download": "searched", "parse": "downloaded", "extract": "parsed"}
+        with self._lock:
+            for stage, state in previous.items():
+                self._conn.execute(
+                    "UPDATE documents SET state = ?, failed_stage = NULL, error = NULL "
+                    "WHERE category = ? AND state = ? AND failed_stage = ?",
+                    (state, category, FAILED, stage),
+                )
+            self._conn.commit()
+
+    def counts(self, category):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM documents WHERE category = ? GROUP BY state", (category,)
+            ).fetchall()
+        return dict(rows)
+
+def _written_sources(output_path, output_format):
+    """Count the entries per ``source_file`` already in an output file."""
+    if not os.path.exists(output_path):
+        return {}
+    if output_format == "csv":
+        with open(output_path, "r", newline="", encoding="utf-8") as f:
+            sources = [row.get("source_file") for row in csv.DictReader(f)]
+    else:
+        sources = [entry.get("source_file") for entry in read_entries(output_path)]
+    counts = {}
+    for source in sources:
+        counts[source] = counts.get(source, 0) + 1
+    return counts
+
+def _resolve_interrupted_writes(store, category, output_path, output_format):
+    """Settle documents a killed run left in "writing": extracted if their entries reached the output."""
+    interrupted = store.pending(category, "writing")
+    if not interrupted:
+        return
+    written = _written_sources(output_path, output_format)
+    for doc in interrupted:
+        if doc["url"] in written:
+            store.update(doc["url"], category, "extracted", entries=written[doc["url"]], error=None)
+        else:
+            store.update(doc["url"], category, "parsed")
+    logger.info(f"Resolved {len(interrupted)} documents interrupted while writing")
+
+def _run_stage(name, work, inbox, outbox, workers, downstream_workers):
+    """Run ``work(doc)`` on a pool of threads; forward non-None results and then end-of-stream markers."""
+    def loop():
+        while True:
+            doc = inbox.get()
+            if doc is None:
+                return
+            result = work(doc)
+            if result is not None and outbox is not None:
+                outbox.put(result)
+
+    threads = [threading.Thread(target=loop, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            outbox.put(None)
+    logger.info(f"Stage {name} finished")
+
+def run_pipeline(category, num_results, output_path, output_format="jsonl", db_path=DB_PATH,
+                 download_workers=8, parse_workers=4, extract_workers=4, retry_failed=False, skip_search=False,
+                 store_path=None):
+    """Search → download → parse → extract → write, with per-document state kept in SQLite.
+
+    Documents already extracted are never reprocessed; others resume from their last
+    completed stage. Stages run concurrently and hand documents on through queues.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Harvest output must be appendable ({', '.join(OUTPUT_FORMATS)}); "
+                         f"convert it afterwards with `python main.py --reexport {output_path} --format {output_format}`")
+
+    from extraction.llm_extractor import LLMExtractor
+    from extraction.response_cache import ResponseCache
+
+    store = JobStore(db_path)
+    _resolve_interrupted_writes(store, category, output_path, output_format)
+    if retry_failed:
+        store.retry_failed(category)
+    if not skip_search:
+        results = search_papers(category, num_results)
+        store.add_searched(category, results)
+        logger.info(f"Search returned {len(results)} papers for {category}")
+
+    fetcher = PdfFetcher(max_workers=download_workers)
+    pdf_cache = PdfTextCache()
+    extractor = LLMExtractor(category=category, response_cache=ResponseCache())
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+    download_q, parse_q, extract_q = queue.Queue(), queue.Queue(), queue.Queue()
+    writer_lock = threading.Lock()
+    # Appending keeps the entries of documents extracted by earlier runs
+    append = os.path.exists(output_path)
+    writer = open_writer(output_path, output_format, append=append)
+    if store_path:
+        from results_store import ResultStore
+
+        writer = TeeWriter(writer, ResultStore(store_path))
+
+    def download(doc):
+        fetched = fetcher.fetch(doc["url"])
+        if fetched["content"] is None:
+            store.fail(doc["url"], category, "download", fetched["error"])
+            return None
+        pdf_path = os.path.join(DOWNLOAD_DIR, f"{hashlib.sha256(doc['url'].encode('utf-8')).hexdigest()}.pdf")
+        fd, tmp_path = tempfile.mkstemp(dir=DOWNLOAD_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(fetched["content"])
+        os.replace(tmp_path, pdf_path)
+        store.update(doc["url"], category, "downloaded", pdf_path=pdf_path)
+        return dict(doc, pdf_path=pdf_path)
+
+    def parse(doc):
+        try:
+            # Text lands in the PDF text cache, so a resumed run only re-reads it from there
+            doc["text"] = parse_pool.submit(parse_in_worker, doc["pdf_path"]).result()
+        except Exception as e:
+            store.fail(doc["url"], category, "parse", e)
+            return None
+        store.update(doc["url"], category, "parsed")
+        return doc
+
+    def extract(doc):
+        try:
+            text = doc.get("text")
+            if text is None:
+                text = extract_text_from_pdf(doc["pdf_path"], cache=pdf_cache)
+            # The extract workers bound LLM concurrency, so a long paper's windows run one at a time
+            entries = extractor.extract_parameters(text, max_workers=1)
+            for entry in entries:
+                entry["source_file"] = doc["url"]
+        except Exception as e:
+            store.fail(doc["url"], category, "extract", e)
+            return None
+        if entries:
+            # Recorded before writing so a resumed run checks the output instead of writing twice
+            store.update(doc["url"], category, "writing")
+            try:
+                with writer_lock:
+                    writer.write_entries(entries)
+            except Exception as e:
+                # Left in "writing": the next run finds out from the output whether the entries landed
+                logger.error(f"Writing entries for {doc['url']} failed: {e}")
+                return None
+        store.update(doc["url"], category, "extracted", entries=len(entries), error=None)
+        return None
+
+    # Resume: seed each queue with the documents whose last completed stage feeds it
+    for doc in store.pending(category, "searched"):
+        download_q.put(doc)
+    for doc in store.pending(category, "downloaded"):
+        parse_q.put(doc)
+    for doc in store.pending(category, "parsed"):
+        extract_q.put(doc)
+    for _ in range(download_workers):
+        download_q.put(None)
+
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers, initializer=init_parse_worker,
+                                 initargs=(pdf_cache,)) as parse_pool:
+            stages = [
+                threading.Thread(target=_run_stage, args=("download", download, download_q, parse_q,
+                                                          download_workers, parse_workers)),
+                threading.Thread(target=_run_stage, args=("parse", parse, parse_q, extract_q,
+                                                          parse_workers, extract_workers)),
+                threading.Thread(target=_run_stage, args=("extract", extract, extract_q, None,
+                                                          extract_workers, 0)),
+            ]
+            for stage in stages:
+                stage.start()
+            for stage in stages:
+                stage.join()
+    finally:
+        writer.close()
+    counts = store.counts(category)
+    logger.info(f"Pipeline finished for {category}: {counts}")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest synthesis parameters: search, download, parse, extract.")
+    parser.add_argument("--category", required=True, choices=CATEGORIES)
+    parser.add_argument("--num-results", type=int, default=50, help="Number of search results to harvest")
+    parser.add_argument("--output", default="output/harvest.jsonl", help="Output path")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl",
+                        help="Appendable output format; use main.py --reexport to convert to json/parquet")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite job store path")
+    parser.add_argument("--download-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=4)
+    parser.add_argument("--extract-workers", type=int, default=4)
+    parser.add_argument("--retry-failed", action="store_true", help="Retry documents that failed in a previous run")
+    parser.add_argument("--store", help="Also add entries to this SQLite results store")
+    parser.add_argument("--skip-search", action="store_true", help="Only resume documents already in the job store")
+    args = parser.parse_args()
+    run_pipeline(args.category, args.num_results, args.output, args.format, args.db,
+                 args.download_workers, args.parse_workers, args.extract_workers,
+                 retry_failed=args.retry_failed, skip_search=args.skip_search, store_path=args.store)
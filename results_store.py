@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from extraction.categories import CATEGORIES
+from normalize import parse_duration, parse_temperature
+from writers import read_entries
+from logger import setup_logger
+
+logger = setup_logger('results_store')
+
+DB_PATH = "output/results.sqlite"
+
+class ResultStore:
+    """Accumulated, queryable SQLite dataset of extracted synthesis entries.
+
+    Each entry is stored once per source document (re-ingesting the same paper is a
+    no-op) with numeric temperature (°C) and reaction time (hours) ranges parsed from the
+    free text, so range queries use indexes instead of re-parsing strings. Implements
+    ``write_entries``/``close`` so it can be passed anywhere a result writer is accepted.
+    """
+
+    def __init__(self, path=DB_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                entry_hash TEXT NOT NULL,
+                category TEXT,
+                method TEXT COLLATE NOCASE,
+                precursor TEXT COLLATE NOCASE,
+                solvent TEXT,
+                ph TEXT,
+                temperature TEXT,
+                reaction_time TEXT,
+                temp_min_c REAL,
+                temp_max_c REAL,
+                time_min_h REAL,
+                time_max_h REAL,
+                data TEXT NOT NULL,
+                ingested_at REAL NOT NULL,
+                UNIQUE (source, entry_hash)
+            )"""
+        )
+        # NOCASE columns let prefix LIKE queries ("hydrothermal%") use their indexes
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_category_temp ON entries (category, temp_min_c, temp_max_c)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_category_time ON entries (category, time_min_h, time_max_h)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_method ON entries (method, temp_min_c)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_precursor ON entries (precursor)")
+        self._conn.commit()
+
+    @staticmethod
+    def _text(value):
+        """Return a field value as column text; the model may answer with lists or objects."""
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, (list, tuple)):
+            return ", ".join(str(item) for item in value)
+        if isinstance(value, (int, float)):
+            return str(value)
+        return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+    @classmethod
+    def _row(cls, entry, source):
+        data = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+        fields = {name: cls._text(entry.get(name))
+                  for name in ("category", "method", "precursor", "solvent", "pH", "temperature", "reaction_time")}
+        temp_min, temp_max = parse_temperature(fields["temperature"])
+        time_min, time_max = parse_duration(fields["reaction_time"])
+        return (source, hashlib.sha256(data.encode("utf-8")).hexdigest(), fields["category"],
+                fields["method"], fields["precursor"], fields["solvent"], fields["pH"],
+                fields["temperature"], fields["reaction_time"],
+                temp_min, temp_max, time_min, time_max, data, time.time())
+
+    def add_entries(self, entries, source=None):
+        """Store entries, taking the source from ``source`` or each entry's ``source_file``.
+
+        Error entries are skipped. Returns the number of new rows.
+        """
+        rows = [self._row(entry, source or entry.get("source_file") or "")
+                for entry in entries if "error" not in entry]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (source, entry_hash, category, method, precursor, solvent, ph, "
+                "temperature, reaction_time, temp_min_c, temp_max_c, time_min_h, time_max_h, data, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def write_entries(self, entries):
+        self.add_entries(entries)
+
+    def query(self, category=None, method=None, precursor=None, temp_min=None, temp_max=None,
+              time_min=None, time_max=None, source=None, limit=None):
+        """Return stored entries matching every given filter.
+
+        ``method`` and ``precursor`` match case-insensitively by prefix. Temperature (°C) and
+        time (hours) bounds select entries whose whole parsed range lies within them.
+        """
+        clauses, params = [], []
+        for column, value in (("category", category), ("source", source)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for column, value in (("method", method), ("precursor", precursor)):
+            if value is not None:
+                clauses.append(f"{column} LIKE ?")
+                params.append(value.replace("%", "").replace("_", "") + "%")
+        for column, op, value in (("temp_min_c", ">=", temp_min), ("temp_max_c", "<=", temp_max),
+                                  ("time_min_h", ">=", time_min), ("time_max_h", "<=", time_max)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT source, data FROM entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(json.loads(data), source_file=source) for source, data in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accumulate and query extracted synthesis entries.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite results store path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Add entries from JSON/JSONL result files")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--source", help="Source document for entries without a source_file")
+    query = commands.add_parser("query", help="Print matching entries as JSON lines")
+    query.add_argument("--category", choices=CATEGORIES)
+    query.add_argument("--method", help="Method prefix, e.g. hydrothermal")
+    query.add_argument("--precursor", help="Precursor prefix, e.g. zinc")
+    query.add_argument("--temp-min", type=float, help="Lowest temperature in °C")
+    query.add_argument("--temp-max", type=float, help="Highest temperature in °C")
+    query.add_argument("--time-min", type=float, help="Shortest reaction time in hours")
+    query.add_argument("--time-max", type=float, help="Longest reaction time in hours")
+    query.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    with ResultStore(args.db) as store:
+        if args.command == "ingest":
+            for path in args.paths:
+                added = store.add_entries(read_entries(path), source=args.source)
+                logger.info(f"Ingested {added} new entries from {path}")
+            logger.info(f"{store.count()} entries in {args.db}")
+        else:
+            start = time.perf_counter()
+            entries = store.query(args.category, args.method, args.precursor, args.temp_min, args.temp_max,
+                                  args.time_min, args.time_max, limit=args.limit)
+            for entry in entries:
+                sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            logger.info(f"{len(entries)} entries in {(time.perf_counter() - start) * 1000:.1f} ms")
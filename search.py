@@ -1,32 +1,149 @@
 import os
+import json
+import math
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import requests
+from requests.adapters import HTTPAdapter
+from env import load_env
 from logger import setup_logger
-from dotenv import load_dotenv
 
 logger = setup_logger('nanomaterial_search')
 
-def search_papers(category, num_results):
-    """Search for papers using Serper Google Search API based on category."""
+SERPER_URL = "https://google.serper.dev/search"
+PAGE_SIZE = 10
+MAX_RESULTS = 500
+CACHE_PATH = "cache/search_cache.json"
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+_lock = threading.Lock()
+_session = None
+
+def _get_session(max_workers):
+    """Return the module-wide pooled session."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+            _session.mount("http://", HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers))
+        return _session
+
+def normalize_url(url):
+    """Normalize a URL for deduplication: lowercase host, no www., fragment, tracking params or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       host, parts.path.rstrip("/"), query, ""))
+
+def _cache_key(url, query):
+    """Cache key for a query against one search endpoint."""
+    return f"{url} {query}"
+
+class SearchCache:
+    """JSON file cache of search results keyed by endpoint and query, with a TTL."""
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, query):
+        """Return the cached record ({"results", "exhausted", "time"}) for a query, or None."""
+        record = self._load().get(query)
+        if record is None or time.time() - record["time"] > self.ttl_seconds:
+            return None
+        return record
+
+    def put(self, query, results, exhausted):
+        with _lock:
+            data = self._load()
+            now = time.time()
+            data = {q: r for q, r in data.items() if now - r["time"] <= self.ttl_seconds}
+            data[query] = {"results": results, "exhausted": exhausted, "time": now}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+def _fetch_page(session, url, headers, query, page):
+    """Fetch one page of organic results."""
+    payload = {"q": query, "num": PAGE_SIZE, "page": page}
+    response = session.post(url, json=payload, headers=headers, timeout=10)
+    response.raise_for_status()
+    return response.json().get("organic", [])
+
+def search_papers(category, num_results, base_url=None, cache=None, max_workers=8):
+    """Search for papers using Serper Google Search API based on category.
+
+    Pages are fetched concurrently over a pooled session, deduplicated by normalized URL and
+    cached per endpoint and query, so repeated searches (or smaller follow-ups) make no
+    network calls. If a page fails, the results of the pages before it are returned uncached.
+    """
     try:
-        load_dotenv()
+        load_env()
         api_key = os.getenv("SERPER_API_KEY")
         if not api_key:
             logger.error("SERPER_API_KEY not found in .env")
             return []
 
+        num_results = max(1, min(num_results, MAX_RESULTS))
         query = f"{category} synthesis parameters filetype:pdf"
-        url = "https://google.serper.dev/search"
+        url = base_url or os.getenv("SERPER_URL", SERPER_URL)
+        cache_key = _cache_key(url, query)
+        cache = cache if cache is not None else SearchCache()
+        record = cache.get(cache_key)
+        if record is not None and (len(record["results"]) >= num_results or record["exhausted"]):
+            logger.info(f"Search cache hit for category: {category}")
+            return record["results"][:num_results]
+
         headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
-        payload = {"q": query, "num": min(num_results, 10)}
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
-        results = response.json().get("organic", [])
-        formatted_results = [
-            {"title": item.get("title", "Untitled"), "url": item.get("link", "")}
-            for item in results[:min(num_results, 10)]
-        ]
-        logger.info(f"Fetched {len(formatted_results)} papers for category: {category}")
-        return formatted_results
+        session = _get_session(max_workers)
+        formatted_results = []
+        seen = set()
+        next_page = 1
+        exhausted = False
+        failed = False
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Duplicates can leave us short, so keep requesting pages until full or out of results
+            while (len(formatted_results) < num_results and not exhausted and not failed
+                   and next_page <= MAX_RESULTS // PAGE_SIZE):
+                pages_needed = math.ceil((num_results - len(formatted_results)) / PAGE_SIZE)
+                pages = range(next_page, next_page + pages_needed)
+                next_page += pages_needed
+                try:
+                    # Pages arrive in order, so a failure keeps the results of every page before it
+                    for items in pool.map(lambda p: _fetch_page(session, url, headers, query, p), pages):
+                        if len(items) < PAGE_SIZE:
+                            exhausted = True
+                        for item in items:
+                            link = item.get("link", "")
+                            key = normalize_url(link) if link else None
+                            if not key or key in seen:
+                                continue
+                            seen.add(key)
+                            formatted_results.append({"title": item.get("title", "Untitled"), "url": link})
+                except Exception as e:
+                    logger.error(f"Error fetching search results for {category}, "
+                                 f"keeping {len(formatted_results)} from earlier pages: {str(e)}")
+                    failed = True
+        if not failed:
+            cache.put(cache_key, formatted_results, exhausted)
+        logger.info(f"Fetched {len(formatted_results[:num_results])} papers for category: {category}")
+        return formatted_results[:num_results]
     except Exception as e:
         logger.error(f"Error searching papers: {str(e)}")
-        return []
\ No newline at end of file
+        return []
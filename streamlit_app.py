@@ -1,18 +1,40 @@
 import streamlit as st
 import pandas as pd
-from extraction.llm_extractor import LLMExtractor
-from pdf_utils import extract_text_from_pdf
+from extraction.categories import CATEGORY_CHOICES
+from extraction.registry import get_extractor
+from pdf_utils import iter_pdf_text, join_pages
+from pdf_cache import PdfTextCache
+from extraction.response_cache import ResponseCache
 from logger import setup_logger
 from search import search_papers
+from writers import CsvWriter, JsonArrayWriter
+from fetcher import PdfFetcher
 import os
 import json
-import csv
-import tempfile
-import io
-import requests
+import queue
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 logger = setup_logger('nanomaterial_extraction')
 
+# Search results whose PDFs are downloaded eagerly; later ones are fetched on request, so a
+# large search does not hold every PDF in each session's state
+PREFETCH_RESULTS = 10
+
+@st.cache_resource
+def get_pdf_text_cache():
+    """Return the process-wide PDF text cache (shared across reruns and sessions)."""
+    return PdfTextCache()
+
+@st.cache_resource
+def get_pdf_fetcher():
+    """Return the process-wide PDF fetcher (pooled session and on-disk download cache)."""
+    return PdfFetcher()
+
+@st.cache_resource
+def get_response_cache():
+    """Return the process-wide LLM response cache (shared across reruns and sessions)."""
+    return ResponseCache()
+
 def save_to_json(data, output_path):
     """Save extracted data to a JSON file."""
     try:
@@ -20,8 +42,8 @@ def save_to_json(data, output_path):
         if not data:
             logger.warning("No data to save to JSON")
             return "No synthesis parameters extracted for the chosen category"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with JsonArrayWriter(output_path) as writer:
+            writer.write_entries(data)
         logger.info(f"Saved extracted parameters to {output_path}")
         return f"Extracted {len(data)} synthesis entries"
     except Exception as e:
@@ -35,30 +57,47 @@ def save_to_csv(data, output_path):
         if not data:
             logger.warning("No data to save to CSV")
             return "No synthesis parameters extracted for the chosen category"
-        keys = data[0].keys()
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(data)
+        # Fixed schema so error rows fit; unknown keys go to the "extra" column
+        with CsvWriter(output_path) as writer:
+            writer.write_entries(data)
         logger.info(f"Saved extracted parameters to {output_path}")
         return f"Extracted {len(data)} synthesis entries"
     except Exception as e:
         logger.error(f"Error saving CSV: {str(e)}")
         return f"Error saving CSV: {str(e)}"
 
-def extract_parameters(category, output_format, pdf_file):
-    """Extract synthesis parameters from an uploaded PDF file."""
+# Uploaded PDFs extracted at the same time
+MAX_CONCURRENT_EXTRACTIONS = 4
+
+def extract_file_entries(extractor, pdf_cache, pdf_file, index, events):
+    """Extract entries from one uploaded PDF in a worker thread, reporting progress through ``events``.
+
+    The upload buffer is parsed in place (no temporary file) and only on a text cache miss.
+    """
+    try:
+        pdf_bytes = memoryview(pdf_file.getbuffer())
+        events.put((index, "Parsing PDF..."))
+        pdf_text = join_pages(pdf_cache.get_or_extract(pdf_bytes, lambda: iter_pdf_text(pdf_bytes)))
+        events.put((index, "Extracting parameters..."))
+        entries = []
+        for entry in extractor.stream_parameters(pdf_text):
+            entry["source_file"] = pdf_file.name
+            entries.append(entry)
+            events.put((index, f"{len(entries)} entries so far..."))
+        return entries
+    except Exception as e:
+        logger.error(f"Error extracting {pdf_file.name}: {str(e)}")
+        return [{"error": str(e), "source_file": pdf_file.name}]
+
+def extract_parameters(category, output_format, pdf_files, progress_slots=None):
+    """Extract synthesis parameters from uploaded PDF files, several at a time.
+
+    If ``progress_slots`` (one ``st.empty()`` per file) is given, each shows its file's
+    progress; widgets are only touched from this thread, workers report through a queue.
+    """
     try:
         # Validate inputs
-        categories = [
-            "Metal Oxides",
-            "Metal Sulfides",
-            "Metal-Organic Frameworks",
-            "Carbon-based",
-            "Polymeric Nanomaterials",
-            "Pure Metals / Alloys"
-        ]
-        if category not in categories:
+        if category not in CATEGORY_CHOICES:
             logger.error(f"Invalid category: {category}")
             return f"Invalid category: {category}", None, None, None
         
@@ -66,35 +105,46 @@ def extract_parameters(category, output_format, pdf_file):
             logger.error(f"Invalid output format: {output_format}")
             return f"Invalid output format: {output_format}", None, None, None
         
-        # Validate PDF file
-        if pdf_file is None:
+        # Validate PDF files
+        if not pdf_files:
             logger.error("No PDF file uploaded")
             return "Error: No PDF file uploaded", None, None, None
         
-        if not pdf_file.name.lower().endswith('.pdf'):
-            logger.error(f"Invalid file type: {pdf_file.name}")
-            return "Error: Uploaded file must be a PDF", None, None, None
+        for pdf_file in pdf_files:
+            if not pdf_file.name.lower().endswith('.pdf'):
+                logger.error(f"Invalid file type: {pdf_file.name}")
+                return f"Error: {pdf_file.name} is not a PDF", None, None, None
         
-        # Save uploaded PDF to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-            temp_pdf.write(pdf_file.read())
-            temp_pdf_path = temp_pdf.name
+        # Reuse the process-wide extractor for this category (reloaded if the index or prompt changed)
+        logger.info(f"Getting LLM extractor for {category}")
+        extractor = get_extractor(category, response_cache=get_response_cache())
+        pdf_cache = get_pdf_text_cache()
         
-        # Extract text from PDF
-        logger.info(f"Extracting text from uploaded PDF")
-        pdf_text = extract_text_from_pdf(temp_pdf_path)
-        logger.info("PDF text extraction completed")
+        def show(index, message):
+            if progress_slots is not None:
+                progress_slots[index].write(f"**{pdf_files[index].name}**: {message}")
         
-        # Clean up temporary file
-        os.unlink(temp_pdf_path)
-        
-        # Initialize LLM extractor
-        logger.info(f"Initializing LLM extractor for {category}")
-        extractor = LLMExtractor(category=category)
-        
-        # Extract parameters
-        logger.info("Starting parameter extraction")
-        synthesis_entries = extractor.extract_parameters(pdf_text)
+        # Extract parameters from all files concurrently
+        logger.info(f"Starting parameter extraction for {len(pdf_files)} PDFs")
+        events = queue.Queue()
+        results = [None] * len(pdf_files)
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_EXTRACTIONS) as pool:
+            futures = {pool.submit(extract_file_entries, extractor, pdf_cache, pdf_file, i, events): i
+                       for i, pdf_file in enumerate(pdf_files)}
+            for i in range(len(pdf_files)):
+                show(i, "Waiting...")
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                while not events.empty():
+                    show(*events.get())
+                for future in done:
+                    i = futures[future]
+                    results[i] = future.result()
+                    errors = [e["error"] for e in results[i] if "error" in e]
+                    show(i, f"failed: {errors[0]}" if errors and len(errors) == len(results[i])
+                         else f"done, {len(results[i]) - len(errors)} entries")
+        synthesis_entries = [entry for entries in results for entry in entries]
         logger.info("Extraction completed")
         
         # Save results
@@ -152,6 +202,10 @@ if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 if 'num_results' not in st.session_state:
     st.session_state.num_results = 5
+if 'pdf_downloads' not in st.session_state:
+    st.session_state.pdf_downloads = {}
+if 'fetch_pending' not in st.session_state:
+    st.session_state.fetch_pending = False
 
 # Two-column layout with increased spacing
 col_extract, col_search = st.columns([1, 1], gap="large")
@@ -161,14 +215,7 @@ with col_extract:
     st.subheader("Extract Parameters")
     category = st.selectbox(
         "Select Category",
-        [
-            "Metal Oxides",
-            "Metal Sulfides",
-            "Metal-Organic Frameworks",
-            "Carbon-based",
-            "Polymeric Nanomaterials",
-            "Pure Metals / Alloys"
-        ],
+        CATEGORY_CHOICES,
         index=0,
         key="extract_category"
     )
@@ -178,7 +225,7 @@ with col_extract:
         index=0,
         key="extract_format"
     )
-    pdf_file = st.file_uploader("Upload PDF File", type=["pdf"], accept_multiple_files=False)
+    pdf_files = st.file_uploader("Upload PDF Files", type=["pdf"], accept_multiple_files=True)
 
     # Buttons
     col_btn1, col_btn2 = st.columns(2)
@@ -197,17 +244,20 @@ with col_extract:
         st.session_state.pdf_uploaded = False
         st.session_state.extract_triggered = False
         st.session_state.search_results = []
+        st.session_state.pdf_downloads = {}
+        st.session_state.fetch_pending = False
         st.rerun()
 
     # Handle extract button
     if extract_button:
         st.session_state.extract_triggered = True
-        if pdf_file is not None:
-            with st.spinner("Extracting parameters..."):
-                st.session_state.save_status, st.session_state.output_text, st.session_state.file_content, st.session_state.display_data = extract_parameters(category, output_format, pdf_file)
+        if pdf_files:
+            progress_slots = [st.empty() for _ in pdf_files]
+            with st.spinner(f"Extracting parameters from {len(pdf_files)} PDF(s)..."):
+                st.session_state.save_status, st.session_state.output_text, st.session_state.file_content, st.session_state.display_data = extract_parameters(category, output_format, pdf_files, progress_slots)
                 st.session_state.output_format = output_format
         else:
-            st.session_state.save_status = "Please upload a PDF file."
+            st.session_state.save_status = "Please upload at least one PDF file."
             st.session_state.output_text = None
             st.session_state.display_data = None
             st.session_state.file_content = None
@@ -250,9 +300,9 @@ with col_search:
         key="search_category"
     )
     st.session_state.num_results = st.number_input(
-        "Number of Search Results (max 10)",
+        "Number of Search Results (max 200)",
         min_value=1,
-        max_value=10,
+        max_value=200,
         value=st.session_state.num_results,
         step=1
     )
@@ -261,9 +311,14 @@ with col_search:
         if st.button("Search Papers"):
             with st.spinner("Searching papers..."):
                 st.session_state.search_results = search_papers(search_category, st.session_state.num_results)
+            # PDFs are fetched once per search, not on every rerun
+            st.session_state.pdf_downloads = {}
+            st.session_state.fetch_pending = True
     with col_search_btn2:
         if st.button("Clear Search Results"):
             st.session_state.search_results = []
+            st.session_state.pdf_downloads = {}
+            st.session_state.fetch_pending = False
     
     if st.session_state.search_results:
         st.subheader("Search Results")
@@ -274,32 +329,59 @@ with col_search:
         )
         st.text_area("", search_text, height=200, key="search_results_text")
         
-        # Download buttons for PDFs
-        for i, result in enumerate(st.session_state.search_results):
-            try:
-                response = requests.get(result['url'], timeout=5)
-                if response.status_code == 200 and 'application/pdf' in response.headers.get('Content-Type', ''):
-                    st.download_button(
-                        label=f"Download {result['title']}",
-                        data=response.content,
-                        file_name=f"{result['title']}.pdf",
-                        mime="application/pdf",
-                        key=f"download_{i}"
-                    )
+        # Download buttons for PDFs, filled in as each fetch completes
+        slots = [st.empty() for _ in st.session_state.search_results]
+        
+        def render_download(i, fetched):
+            result = st.session_state.search_results[i]
+            if fetched["content"] is not None:
+                slots[i].download_button(
+                    label=f"Download {result['title']}",
+                    data=fetched["content"],
+                    file_name=f"{result['title']}.pdf",
+                    mime="application/pdf",
+                    key=f"download_{i}"
+                )
+            elif fetched["error"] == "PDF not available":
+                slots[i].write(f"PDF not available for: {result['title']}")
+            else:
+                slots[i].write(f"Error fetching PDF for {result['title']}: {fetched['error']}")
+        
+        def render_fetch_button(i):
+            result = st.session_state.search_results[i]
+            if slots[i].button(f"Fetch PDF for {result['title']}", key=f"fetch_{i}"):
+                slots[i].write(f"Fetching PDF for: {result['title']}...")
+                fetched = get_pdf_fetcher().fetch(result['url'])
+                st.session_state.pdf_downloads[i] = fetched
+                render_download(i, fetched)
+        
+        prefetch = st.session_state.search_results[:PREFETCH_RESULTS]
+        if st.session_state.fetch_pending:
+            for i, result in enumerate(prefetch):
+                slots[i].write(f"Fetching PDF for: {result['title']}...")
+            for i in range(len(prefetch), len(st.session_state.search_results)):
+                render_fetch_button(i)
+            urls = [result['url'] for result in prefetch]
+            for i, fetched in get_pdf_fetcher().iter_fetch(urls):
+                st.session_state.pdf_downloads[i] = fetched
+                render_download(i, fetched)
+            st.session_state.fetch_pending = False
+        else:
+            for i in range(len(st.session_state.search_results)):
+                if i in st.session_state.pdf_downloads:
+                    render_download(i, st.session_state.pdf_downloads[i])
                 else:
-                    st.write(f"PDF not available for: {result['title']}")
-            except Exception as e:
-                st.write(f"Error fetching PDF for {result['title']}: {str(e)}")
+                    render_fetch_button(i)
 
-# Reset outputs when a new PDF is uploaded
-if pdf_file is not None and not st.session_state.pdf_uploaded:
+# Reset outputs when new PDFs are uploaded
+if pdf_files and not st.session_state.pdf_uploaded:
     st.session_state.output_text = None
     st.session_state.save_status = ""
     st.session_state.file_content = None
     st.session_state.display_data = None
     st.session_state.pdf_uploaded = True
     st.session_state.extract_triggered = False
-elif pdf_file is None:
+elif not pdf_files:
     st.session_state.pdf_uploaded = False
     st.session_state.extract_triggered = False
     st.session_state.output_text = None
@@ -0,0 +1,22 @@
+import json
+
+from extraction.chunking import estimate_tokens, evaluate_recall
+
+EVAL_PATH = "rag/chunking_eval.json"
+TOKEN_BUDGET = 200
+MIN_RECALL = 0.9
+
+
+def test_labelled_papers_exceed_the_budget():
+    with open(EVAL_PATH, "r", encoding="utf-8") as f:
+        documents = json.load(f)
+    assert len(documents) >= 5
+    assert all(estimate_tokens(document["text"]) > 2 * TOKEN_BUDGET for document in documents)
+
+
+def test_selection_keeps_synthesis_snippets():
+    result = evaluate_recall(EVAL_PATH, token_budget=TOKEN_BUDGET)
+    assert result["recall"] >= MIN_RECALL, result
+    # Recall only means something if most of each paper was dropped
+    assert result["token_ratio"] <= 0.5, result
+
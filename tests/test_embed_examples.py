@@ -0,0 +1,32 @@
+import pytest
+
+from embed_examples import embed_in_batches
+from extraction.fakes import FakeRateLimitError
+
+
+class FlakyEmbeddings:
+    """Raises ``error`` for the first ``failures`` calls, then returns one vector per text."""
+
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def test_rate_limits_are_retried():
+    embeddings = FlakyEmbeddings(FakeRateLimitError("429 Resource exhausted"), failures=2)
+    assert embed_in_batches(embeddings, ["a", "bb"], base_delay=0) == [[1.0], [2.0]]
+    assert embeddings.calls == 3
+
+
+def test_invalid_requests_fail_without_retrying():
+    embeddings = FlakyEmbeddings(ValueError("API key not valid"), failures=1)
+    with pytest.raises(ValueError):
+        embed_in_batches(embeddings, ["a"], base_delay=0)
+    assert embeddings.calls == 1
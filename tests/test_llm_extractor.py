@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+from langchain_community.vectorstores import FAISS
+
+from extraction.embedding_cache import QueryEmbeddingCache
+from extraction.fakes import FakeChatModel, FakeEmbeddings
+from extraction.llm_extractor import LLMExtractor
+from extraction.rate_limit import RateLimiter
+
+
+@pytest.fixture(scope="module")
+def vector_store():
+    with open("rag/sample_example.txt", "r", encoding="utf-8") as f:
+        examples = json.load(f)
+    return FAISS.from_texts([e["text_snippet"] for e in examples], FakeEmbeddings(), metadatas=examples)
+
+
+def make_extractor(vector_store, responses=("[]",), **kwargs):
+    return LLMExtractor(category="Metal Oxides", llm=FakeChatModel(responses=list(responses)),
+                        embeddings=FakeEmbeddings(), vector_store=vector_store,
+                        embedding_cache=QueryEmbeddingCache(path=None), **kwargs)
+
+
+def test_stream_of_empty_answer_yields_no_error_without_cache(vector_store):
+    extractor = make_extractor(vector_store)
+    assert list(extractor.stream_from_text("ZnO was synthesized at 180 °C.")) == []
+    assert extractor.extract_from_text("ZnO was synthesized at 180 °C.") == []
+
+
+def failing_window_extractor(vector_store):
+    """Extractor over four windows whose third window raises a timeout."""
+    extractor = make_extractor(vector_store, max_prompt_tokens=40, max_workers=2)
+    text = "\n\n".join(f"Sample {i} was annealed at {100 + i} °C for {i + 1} h in air. " * 3 for i in range(4))
+    windows = extractor.split_windows(text)
+    assert len(windows) == 4
+    return extractor, text, windows
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_failed_window_keeps_other_windows(vector_store, monkeypatch, max_workers):
+    extractor, text, windows = failing_window_extractor(vector_store)
+
+    def extract_from_text(window):
+        if window == windows[2]:
+            raise TimeoutError("window timed out")
+        return [{"precursor": f"window {windows.index(window)}", "method": "annealing"}]
+
+    monkeypatch.setattr(extractor, "extract_from_text", extract_from_text)
+    entries = extractor.extract_parameters(text, max_workers=max_workers)
+    assert [e["precursor"] for e in entries if "error" not in e] == ["window 0", "window 1", "window 3"]
+    assert [e for e in entries if "error" in e] == [{"error": "window timed out", "window": 2}]
+
+
+def test_failed_window_keeps_other_windows_async(vector_store, monkeypatch):
+    extractor, text, windows = failing_window_extractor(vector_store)
+
+    async def aextract_from_text(window, semaphore=None):
+        if window == windows[2]:
+            raise TimeoutError("window timed out")
+        return [{"precursor": f"window {windows.index(window)}", "method": "annealing"}]
+
+    monkeypatch.setattr(extractor, "aextract_from_text", aextract_from_text)
+    (entries,) = asyncio.run(extractor.aextract_many([text]))
+    assert [e["precursor"] for e in entries if "error" not in e] == ["window 0", "window 1", "window 3"]
+    assert [e for e in entries if "error" in e] == [{"error": "window timed out", "window": 2}]
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(requests_per_minute=600)
+        self.acquired = 0
+
+    async def acquire(self, tokens=0):
+        self.acquired += 1
+        await super().acquire(tokens)
+
+
+class CountingSemaphore(asyncio.Semaphore):
+    def __init__(self, value=1):
+        super().__init__(value)
+        self.entered = 0
+
+    async def __aenter__(self):
+        self.entered += 1
+        return await super().__aenter__()
+
+
+def test_async_continuation_is_rate_limited_and_bounded(vector_store):
+    truncated = '[{"precursor": "zinc nitrate", "method": "hydrothermal"}, {"precursor": "HMT'
+    # The continuation restarts the list, so the first entry must not be duplicated
+    restarted = ('[{"precursor": "zinc nitrate", "method": "hydrothermal"}, '
+                 '{"precursor": "HMTA", "method": "hydrothermal"}]')
+    limiter = CountingLimiter()
+    extractor = make_extractor(vector_store, responses=(truncated, restarted), rate_limiter=limiter)
+    semaphore = CountingSemaphore()
+
+    entries = asyncio.run(extractor.aextract_parameters("ZnO was synthesized at 90 °C.", semaphore))
+
+    assert [e["precursor"] for e in entries] == ["zinc nitrate", "HMTA"]
+    assert limiter.acquired == 2
+    assert semaphore.entered == 2
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from normalize import normalize_entries, parse_duration, parse_temperature
+
+TEMPERATURES = [
+    ("heated at 5 K min-1 to 723 K", (449.85, 449.85)),
+    ("5 °C min-1 to 450 °C", (450.0, 450.0)),
+    ("ramped at 10 °C min⁻¹ to 600 °C", (600.0, 600.0)),
+    ("heated at 2 °C/min to 500 °C", (500.0, 500.0)),
+    ("1-5 °C min-1 to 450 °C", (450.0, 450.0)),
+    ("100-120 °C", (100.0, 120.0)),
+    ("-20 °C", (-20.0, -20.0)),
+]
+
+DURATIONS = [
+    ("2 hours 30 min", (2.5, 2.5)),
+    ("1 day 12 h", (36.0, 36.0)),
+    ("12 h, 24 h", (12.0, 24.0)),
+    ("24 cycles", (None, None)),
+]
+
+
+@pytest.mark.parametrize("text, expected", TEMPERATURES)
+def test_parse_temperature_skips_heating_rates(text, expected):
+    assert parse_temperature(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, expected", DURATIONS)
+def test_parse_duration_sums_compound_times(text, expected):
+    low, high = parse_duration(text)
+    if expected[0] is None:
+        assert (low, high) == expected
+    else:
+        assert (low, high) == pytest.approx(expected)
+
+
+def test_vectorized_table_matches_scalar_parsers():
+    entries = ([{"temperature": text} for text, _ in TEMPERATURES]
+               + [{"reaction_time": text} for text, _ in DURATIONS]
+               + [{"pH": "13-15"}, {"pH": "pH 7-9"}])
+    table = normalize_entries(entries)
+    for row, (_, expected) in enumerate(TEMPERATURES):
+        assert (table.temp_min_c[row], table.temp_max_c[row]) == pytest.approx(expected, abs=1e-3)
+    for row, (_, expected) in enumerate(DURATIONS, start=len(TEMPERATURES)):
+        if expected[0] is None:
+            assert math.isnan(table.time_min_h[row]) and math.isnan(table.time_max_h[row])
+        else:
+            assert (table.time_min_h[row], table.time_max_h[row]) == pytest.approx(expected)
+    ph = table[["ph_min", "ph_max"]].iloc[-2:].to_numpy()
+    assert math.isnan(ph[0][0]) and math.isnan(ph[0][1])
+    assert tuple(ph[1]) == (7.0, 9.0)
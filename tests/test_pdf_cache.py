@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfWriter
+
+from pdf_cache import PdfTextCache
+from pdf_utils import init_parse_worker, parse_in_worker
+
+
+class CountingCache(PdfTextCache):
+    """PdfTextCache that records each directory scan in a file, so scans in workers are visible."""
+
+    def __init__(self, cache_dir, scan_log):
+        super().__init__(cache_dir)
+        self.scan_log = scan_log
+
+    def evict(self):
+        with open(self.scan_log, "a") as f:
+            f.write("scan\n")
+        super().evict()
+
+
+def write_pdf(path, title):
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    # Distinct metadata gives each file distinct bytes and so its own cache key
+    writer.add_metadata({"/Title": title})
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_pool_worker_scans_cache_once(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"paper{i}.pdf"
+        write_pdf(path, f"paper {i}")
+        paths.append(str(path))
+    scan_log = tmp_path / "scans.log"
+    cache = CountingCache(str(tmp_path / "cache"), str(scan_log))
+
+    with ProcessPoolExecutor(max_workers=1, initializer=init_parse_worker, initargs=(cache,)) as pool:
+        list(pool.map(parse_in_worker, paths))
+
+    assert len(os.listdir(tmp_path / "cache")) > 0
+    # Only the worker's first put scans the directory; later puts update its size estimate
+    assert scan_log.read_text().count("scan") == 1
@@ -0,0 +1,24 @@
+import pytest
+
+from pipeline import JobStore
+
+
+def test_job_store_rejects_unknown_states(tmp_path):
+    store = JobStore(str(tmp_path / "harvest.sqlite"))
+    store.add_searched("Metal Oxides", [{"url": "https://example.org/a.pdf", "title": "A"}])
+    store.update("https://example.org/a.pdf", "Metal Oxides", "downloaded", pdf_path="a.pdf")
+    assert [doc["url"] for doc in store.pending("Metal Oxides", "downloaded")] == ["https://example.org/a.pdf"]
+
+    with pytest.raises(ValueError):
+        store.update("https://example.org/a.pdf", "Metal Oxides", "download")
+    with pytest.raises(ValueError):
+        store.pending("Metal Oxides", "parse")
+
+
+def test_retry_failed_returns_documents_to_the_previous_state(tmp_path):
+    store = JobStore(str(tmp_path / "harvest.sqlite"))
+    store.add_searched("Metal Oxides", [{"url": "https://example.org/a.pdf", "title": "A"}])
+    store.fail("https://example.org/a.pdf", "Metal Oxides", "parse", RuntimeError("bad PDF"))
+    assert store.counts("Metal Oxides") == {"failed": 1}
+    store.retry_failed("Metal Oxides")
+    assert store.counts("Metal Oxides") == {"downloaded": 1}
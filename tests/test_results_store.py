@@ -0,0 +1,20 @@
+from results_store import ResultStore
+
+
+def test_list_valued_fields_are_stored_as_text(tmp_path):
+    entry = {
+        "category": "Metal Oxides",
+        "method": "hydrothermal",
+        "precursor": ["zinc nitrate", "HMTA"],
+        "solvent": {"water": "40 mL"},
+        "pH": 7,
+        "temperature": "90 °C",
+        "reaction_time": "6 h",
+    }
+    with ResultStore(str(tmp_path / "results.sqlite")) as store:
+        assert store.add_entries([entry], source="paper.pdf") == 1
+        row = store._conn.execute("SELECT precursor, solvent, ph, temp_min_c FROM entries").fetchone()
+        assert row == ("zinc nitrate, HMTA", '{"water": "40 mL"}', "7", 90.0)
+        # The prefix query sees the joined precursor, and the stored entry keeps its original list
+        (stored,) = store.query(precursor="zinc")
+        assert stored["precursor"] == ["zinc nitrate", "HMTA"]
@@ -0,0 +1,48 @@
+from extraction.routing import route_categories
+
+COMBINED = """Experimental
+ZnO/CdS heterostructures were synthesized by a hydrothermal method. Zinc acetate was dissolved
+in deionized water and heated at 180 °C in an autoclave, then CdS was deposited from cadmium
+nitrate and thioacetamide, and the product was calcined at 400 °C."""
+
+SEPARATE = """Synthesis of ZnO
+ZnO nanorods were synthesized by a hydrothermal method from zinc nitrate at 120 °C and calcined at 400 °C.
+
+Synthesis of CdS
+CdS nanoparticles were precipitated from cadmium acetate and thiourea at 80 °C, then annealed."""
+
+INTRO_ONLY_MENTION = """Introduction
+Graphene and polymer composites have been studied widely.
+
+Experimental
+ZnO nanoparticles were synthesized by a sol-gel method and calcined at 500 °C in air."""
+
+ZIF8_WITH_PEROXIDE = """Synthesis of ZIF-8
+ZIF-8 was synthesized by dissolving zinc nitrate hexahydrate and 2-methylimidazole in methanol and
+stirring for 24 h at room temperature. The crystals were washed, treated with hydrogen peroxide
+(30 wt%) and dried at 80 °C."""
+
+GRAPHENE_OXIDE_HUMMERS = """Preparation of graphene oxide
+Graphene oxide was prepared from natural graphite by a modified Hummers method. Graphite powder was
+stirred in concentrated H2SO4, KMnO4 was added slowly below 20 °C and the mixture was heated at
+35 °C for 2 h. Hydrogen peroxide was added to stop the reaction and the product was dried at 60 °C."""
+
+
+def test_combined_chunk_keeps_minority_category():
+    assert set(route_categories(COMBINED)) == {"Metal Oxides", "Metal Sulfides"}
+
+
+def test_separate_sections_route_to_both_categories():
+    assert set(route_categories(SEPARATE)) == {"Metal Oxides", "Metal Sulfides"}
+
+
+def test_non_synthesis_mentions_are_ignored():
+    assert route_categories(INTRO_ONLY_MENTION) == ["Metal Oxides"]
+
+
+def test_peroxide_is_not_a_metal_oxide():
+    assert route_categories(ZIF8_WITH_PEROXIDE) == ["Metal-Organic Frameworks"]
+
+
+def test_graphene_oxide_is_not_a_metal_oxide():
+    assert route_categories(GRAPHENE_OXIDE_HUMMERS) == ["Carbon-based"]
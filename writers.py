@@ -0,0 +1,178 @@
+import csv
+import json
+import os
+import textwrap
+from abc import ABC, abstractmethod
+from logger import setup_logger
+
+logger = setup_logger('writers')
+
+# Stable output schema; keys outside it are kept as JSON in the "extra" column of tabular formats
+ENTRY_FIELDS = ["category", "precursor", "temperature", "pH", "method", "solvent", "reaction_time", "text_snippet"]
+SCHEMA_FIELDS = ENTRY_FIELDS + ["source_file", "error"]
+EXTRA_FIELD = "extra"
+
+def _ensure_parent(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+def to_row(entry, fields=SCHEMA_FIELDS):
+    """Project an entry onto the schema, folding unknown keys into the extra column."""
+    row = {field: entry.get(field) for field in fields}
+    extra = {key: value for key, value in entry.items() if key not in fields}
+    row[EXTRA_FIELD] = json.dumps(extra, ensure_ascii=False) if extra else None
+    return row
+
+class ResultWriter(ABC):
+    """Base class for writers that append entries as each paper finishes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        _ensure_parent(path)
+
+    @abstractmethod
+    def write_entries(self, entries):
+        """Write a batch of entries (typically one paper's) and flush them to disk."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class JsonlWriter(ResultWriter):
+    """One JSON object per line, flushed per batch so interrupted runs keep their results."""
+
+    def __init__(self, path, append=False):
+        super().__init__(path)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write_entries(self, entries):
+        for entry in entries:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += len(entries)
+
+    def close(self):
+        self._file.close()
+
+class JsonArrayWriter(ResultWriter):
+    """Streams a JSON array in the same layout as ``json.dump(data, indent=4)``."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[")
+
+    def write_entries(self, entries):
+        for entry in entries:
+            separator = ",\n" if self.count else "\n"
+            self._file.write(separator + textwrap.indent(json.dumps(entry, indent=4, ensure_ascii=False), "    "))
+            self.count += 1
+        self._file.flush()
+
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+
+class CsvWriter(ResultWriter):
+    """CSV with a fixed header; appending to an existing file reuses its header."""
+
+    def __init__(self, path, fields=SCHEMA_FIELDS, append=False):
+        super().__init__(path)
+        self.fields = list(fields)
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        if not write_header:
+            with open(path, "r", newline="", encoding="utf-8") as f:
+                existing = next(csv.reader(f), [])
+            if existing != self.fields + [EXTRA_FIELD]:
+                raise ValueError(f"Cannot append to {path}: header does not match the output schema")
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields + [EXTRA_FIELD])
+        if write_header:
+            self._writer.writeheader()
+
+    def write_entries(self, entries):
+        self._writer.writerows(to_row(entry, self.fields) for entry in entries)
+        self._file.flush()
+        self.count += len(entries)
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter(ResultWriter):
+    """Columnar Parquet output; rows are buffered and written as row groups of ``row_group_size``.
+
+    The file footer is only written on close, so use JSONL when results must survive a crash.
+    """
+
+    def __init__(self, path, fields=SCHEMA_FIELDS, row_group_size=10000):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            logger.error("Parquet output requires pyarrow")
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self.fields = list(fields)
+        self.schema = pa.schema([(field, pa.string()) for field in self.fields + [EXTRA_FIELD]])
+        self.row_group_size = row_group_size
+        self._rows = []
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    def write_entries(self, entries):
+        for entry in entries:
+            row = to_row(entry, self.fields)
+            self._rows.append({key: None if value is None else str(value) for key, value in row.items()})
+        self.count += len(entries)
+        if len(self._rows) >= self.row_group_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        self._flush_rows()
+        self._writer.close()
+
+class TeeWriter(ResultWriter):
+    """Forward each batch of entries to several writers, e.g. an output file and a ResultStore."""
+
+    def __init__(self, *writers):
+        self.writers = writers
+        self.count = 0
+
+    def write_entries(self, entries):
+        for writer in self.writers:
+            writer.write_entries(entries)
+        self.count += len(entries)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+WRITERS = {"json": JsonArrayWriter, "jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+def read_entries(path):
+    """Read entries back from a JSON array or JSON-lines results file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def open_writer(path, output_format, append=False):
+    """Return a streaming writer for the given output format; JSONL and CSV can append."""
+    if output_format not in WRITERS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    logger.info(f"Streaming {output_format} results to {path}")
+    if output_format in ("jsonl", "csv"):
+        return WRITERS[output_format](path, append=append)
+    if append:
+        raise ValueError(f"Appending is not supported for {output_format} output")
+    return WRITERS[output_format](path)